@@ -21,7 +21,7 @@ from ad_manager.utils.openai_utils import generate_ad_copy
 from ad_manager.utils.monitoring import setup_logging, register_performance_metric
 from ad_manager.services.performance_analysis_service import analyze_ad_performance, save_analysis_report
 from modules.ai_engine import AIEngine
-from modules.optimization import CampaignOptimizer
+from modules.optimization import CampaignOptimizer, shutdown as shutdown_optimization
 
 # Inicializar aplicação Flask
 app = Flask(__name__)
@@ -271,6 +271,8 @@ if __name__ == '__main__':
         services_running = False
         # Allow some time for threads to terminate gracefully
         time.sleep(1)
+        # Gravar as recomendações ainda na fila (os._exit não executa o atexit)
+        shutdown_optimization()
         logger.info("Sistema encerrado.")
         os._exit(0)
     
@@ -1,12 +1,252 @@
 import os
+import sys
+import re
 import logging
 import random
 import hashlib
-from typing import List, Dict, Union, Any
+import zlib
+import functools
+import threading
+import numpy as np
+from typing import List, Dict, Union, Any, Set
+
+# Tentar importar o Hyperscan para a busca de palavras-chave se estiver disponível
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
 
 # Configuração de logging
 logger = logging.getLogger(__name__)
 
+# Base de interesses para o setor de dedetização (id, nome, tamanho base do público)
+_BASE_INTERESTS = {
+    "dedetização": (
+        ("6003232470561", "Controle de pragas", 2500000),
+        ("6003164953376", "Manutenção residencial", 3200000),
+        ("6002964951144", "Proprietários de imóveis", 8500000),
+        ("6003020262976", "Serviços residenciais", 5400000),
+        ("6003130847622", "Saúde e bem-estar", 12000000),
+        ("6003109128422", "Famílias com crianças", 6800000)
+    ),
+    "controle": (
+        ("6003232470561", "Controle de pragas", 2500000),
+        ("6003206556718", "Gestão de propriedades", 1800000),
+        ("6003158262642", "Serviços empresariais", 4200000)
+    ),
+    "pragas": (
+        ("6003232470561", "Controle de pragas", 2500000),
+        ("6003107779871", "Jardinagem", 3100000),
+        ("6003050931519", "Melhorias para o lar", 5600000)
+    ),
+    "inseto": (
+        ("6003232470561", "Controle de pragas", 2500000),
+        ("6003107779871", "Jardinagem", 3100000),
+        ("6003022653631", "Ciências naturais", 1700000)
+    ),
+    "rato": (
+        ("6003232470561", "Controle de pragas", 2500000),
+        ("6003128988334", "Proprietários de pets", 5800000),
+        ("6003208575728", "Saúde pública", 1200000)
+    ),
+    "barata": (
+        ("6003232470561", "Controle de pragas", 2500000),
+        ("6003173944272", "Limpeza doméstica", 4300000),
+        ("6003150125934", "Apartamentos e condomínios", 3700000)
+    ),
+    "formiga": (
+        ("6003232470561", "Controle de pragas", 2500000),
+        ("6003107779871", "Jardinagem", 3100000),
+        ("6003144912931", "Vida ao ar livre", 4900000)
+    ),
+    "cupim": (
+        ("6003232470561", "Controle de pragas", 2500000),
+        ("6003164953376", "Manutenção residencial", 3200000),
+        ("6003189204152", "Arquitetura e design", 2900000),
+        ("6003050931519", "Melhorias para o lar", 5600000)
+    ),
+    "mosquito": (
+        ("6003232470561", "Controle de pragas", 2500000),
+        ("6003107779871", "Jardinagem", 3100000),
+        ("6003130847622", "Saúde e bem-estar", 12000000),
+        ("6003144912931", "Vida ao ar livre", 4900000),
+        ("6003149840010", "Atividades ao ar livre", 3900000)
+    ),
+    "escorpião": (
+        ("6003232470561", "Controle de pragas", 2500000),
+        ("6003208575728", "Saúde pública", 1200000),
+        ("6003142268372", "Segurança familiar", 2800000)
+    ),
+    "aranha": (
+        ("6003232470561", "Controle de pragas", 2500000),
+        ("6003142268372", "Segurança familiar", 2800000),
+        ("6003150125934", "Apartamentos e condomínios", 3700000)
+    ),
+    "residencial": (
+        ("6003164953376", "Manutenção residencial", 3200000),
+        ("6002964951144", "Proprietários de imóveis", 8500000),
+        ("6003150125934", "Apartamentos e condomínios", 3700000),
+        ("6003020262976", "Serviços residenciais", 5400000)
+    ),
+    "comercial": (
+        ("6003158262642", "Serviços empresariais", 4200000),
+        ("6003206556718", "Gestão de propriedades", 1800000),
+        ("6003188467993", "Pequenos negócios", 3400000),
+        ("6003116452855", "Restaurantes", 2700000)
+    ),
+    "condomínio": (
+        ("6003150125934", "Apartamentos e condomínios", 3700000),
+        ("6003206556718", "Gestão de propriedades", 1800000),
+        ("6003164953376", "Manutenção residencial", 3200000)
+    ),
+    "empresa": (
+        ("6003158262642", "Serviços empresariais", 4200000),
+        ("6003188467993", "Pequenos negócios", 3400000),
+        ("6003142542397", "Gestão empresarial", 2900000)
+    ),
+    "restaurante": (
+        ("6003116452855", "Restaurantes", 2700000),
+        ("6003139192875", "Indústria alimentícia", 3100000),
+        ("6003158262642", "Serviços empresariais", 4200000)
+    ),
+    "hotel": (
+        ("6003179831999", "Hotelaria", 2200000),
+        ("6003103756568", "Viagens", 7900000),
+        ("6003158262642", "Serviços empresariais", 4200000)
+    ),
+    "escola": (
+        ("6003123570687", "Educação", 6700000),
+        ("6003109128422", "Famílias com crianças", 6800000),
+        ("6003158262642", "Serviços empresariais", 4200000)
+    ),
+    "hospital": (
+        ("6003130847622", "Saúde e bem-estar", 12000000),
+        ("6003208575728", "Saúde pública", 1200000),
+        ("6003172091531", "Profissionais de saúde", 2500000)
+    ),
+    "indústria": (
+        ("6003158262642", "Serviços empresariais", 4200000),
+        ("6003149622679", "Manufatura", 1800000),
+        ("6003178276101", "Profissionais da indústria", 2200000)
+    )
+}
+
+# Combinações recomendadas: (nome, descrição, ((segmento, quantidade), ...), limite total)
+_COMBO_SPECS = (
+    (
+        "Equilibrada: Alcance com Relevância",
+        "Combina interesses amplos com específicos para maximizar alcance com relevância",
+        (("large", 1), ("medium", 2), ("specific", 2)),
+        None
+    ),
+    (
+        # Específicos primeiro; médios completam se houver menos de 3 específicos
+        "Relevância: Audiência Qualificada",
+        "Foca em interesses específicos do setor para uma audiência mais qualificada",
+        (("specific", 3), ("medium", 3)),
+        3
+    ),
+    (
+        "Alcance: Máxima Exposição",
+        "Prioriza o alcance amplo para maximizar a exposição da marca",
+        (("large", 2), ("medium", 2)),
+        None
+    )
+)
+
+def _build_interest_tables():
+    """
+    Converte a base de interesses para o formato de estrutura de arrays (SoA).
+    IDs, nomes e palavras-chave são internados para que comparações e buscas
+    em dicionários possam usar a identidade dos objetos.
+    
+    Returns:
+        tuple: (ids, nomes, tamanhos base, índices por palavra-chave)
+    """
+    positions = {}
+    ids, names, sizes = [], [], []
+    keyword_index = {}
+    
+    for key, interests in _BASE_INTERESTS.items():
+        rows = []
+        for interest_id, name, base_size in interests:
+            interest_id = sys.intern(interest_id)
+            
+            # Cada ID ocupa uma única linha das tabelas
+            if interest_id not in positions:
+                positions[interest_id] = len(ids)
+                ids.append(interest_id)
+                names.append(sys.intern(name))
+                sizes.append(base_size)
+            rows.append(positions[interest_id])
+        keyword_index[sys.intern(key)] = np.array(rows, dtype=np.int64)
+    
+    return (
+        np.array(ids, dtype=object),
+        np.array(names, dtype=object),
+        np.array(sizes, dtype=np.int64),
+        keyword_index
+    )
+
+_INTEREST_IDS, _INTEREST_NAMES, _INTEREST_SIZES, _KEYWORD_INDEX = _build_interest_tables()
+
+# Expressão única com todas as palavras-chave (as mais longas primeiro)
+# O lookahead não consome texto, então ocorrências sobrepostas também são encontradas
+# (como na busca do Hyperscan); nenhuma palavra-chave da base é prefixo de outra
+_KEYWORD_RE = re.compile("(?=(%s))" % "|".join(
+    re.escape(key) for key in sorted(_KEYWORD_INDEX, key=len, reverse=True)
+))
+
+def _compile_keyword_database():
+    """
+    Compila as palavras-chave em um banco do Hyperscan, se a biblioteca estiver disponível.
+    
+    Returns:
+        hyperscan.Database ou None: Banco compilado ou None para usar a expressão regular
+    """
+    if not HYPERSCAN_AVAILABLE:
+        return None
+    
+    try:
+        database = hyperscan.Database()
+        database.compile(
+            expressions=[re.escape(key).encode() for key in _KEYWORDS],
+            ids=list(range(len(_KEYWORDS))),
+            flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(_KEYWORDS)
+        )
+        return database
+    except Exception as e:
+        logger.warning(f"Erro ao compilar palavras-chave no Hyperscan: {str(e)}. Usando expressão regular.")
+        return None
+
+_KEYWORDS = tuple(_KEYWORD_INDEX)
+_KEYWORD_DB = _compile_keyword_database()
+_KEYWORD_DB_LOCK = threading.Lock()  # O scratch do Hyperscan não pode ser compartilhado entre threads
+
+def _match_keywords(query: str) -> Set[str]:
+    """
+    Encontra as palavras-chave da base presentes na consulta.
+    
+    Args:
+        query (str): Consulta já convertida para minúsculas
+        
+    Returns:
+        Set[str]: Palavras-chave encontradas
+    """
+    if _KEYWORD_DB is None:
+        return {match.group(1) for match in _KEYWORD_RE.finditer(query)}
+    
+    matching_keys = set()
+    
+    def on_match(keyword_id, start, end, flags, context):
+        matching_keys.add(_KEYWORDS[keyword_id])
+    
+    with _KEYWORD_DB_LOCK:
+        _KEYWORD_DB.scan(query.encode(), match_event_handler=on_match)
+    
+    return matching_keys
+
 def get_interests(query: str) -> Union[List[Dict], Dict]:
     """
     Consulta a API do Meta para obter interesses relacionados a uma palavra-chave.
@@ -52,164 +292,65 @@ def get_demo_interests(query: str) -> List[Dict]:
     # Para tornar a simulação mais realista, geramos interesses baseados na consulta
     query = query.lower()
     
-    # Base de interesses para o setor de dedetização
-    base_interests = {
-        "dedetização": [
-            {"id": "6003232470561", "name": "Controle de pragas", "audience_size": 2500000},
-            {"id": "6003164953376", "name": "Manutenção residencial", "audience_size": 3200000},
-            {"id": "6002964951144", "name": "Proprietários de imóveis", "audience_size": 8500000},
-            {"id": "6003020262976", "name": "Serviços residenciais", "audience_size": 5400000},
-            {"id": "6003130847622", "name": "Saúde e bem-estar", "audience_size": 12000000},
-            {"id": "6003109128422", "name": "Famílias com crianças", "audience_size": 6800000}
-        ],
-        "controle": [
-            {"id": "6003232470561", "name": "Controle de pragas", "audience_size": 2500000},
-            {"id": "6003206556718", "name": "Gestão de propriedades", "audience_size": 1800000},
-            {"id": "6003158262642", "name": "Serviços empresariais", "audience_size": 4200000}
-        ],
-        "pragas": [
-            {"id": "6003232470561", "name": "Controle de pragas", "audience_size": 2500000},
-            {"id": "6003107779871", "name": "Jardinagem", "audience_size": 3100000},
-            {"id": "6003050931519", "name": "Melhorias para o lar", "audience_size": 5600000}
-        ],
-        "inseto": [
-            {"id": "6003232470561", "name": "Controle de pragas", "audience_size": 2500000},
-            {"id": "6003107779871", "name": "Jardinagem", "audience_size": 3100000},
-            {"id": "6003022653631", "name": "Ciências naturais", "audience_size": 1700000}
-        ],
-        "rato": [
-            {"id": "6003232470561", "name": "Controle de pragas", "audience_size": 2500000},
-            {"id": "6003128988334", "name": "Proprietários de pets", "audience_size": 5800000},
-            {"id": "6003208575728", "name": "Saúde pública", "audience_size": 1200000}
-        ],
-        "barata": [
-            {"id": "6003232470561", "name": "Controle de pragas", "audience_size": 2500000},
-            {"id": "6003173944272", "name": "Limpeza doméstica", "audience_size": 4300000},
-            {"id": "6003150125934", "name": "Apartamentos e condomínios", "audience_size": 3700000}
-        ],
-        "formiga": [
-            {"id": "6003232470561", "name": "Controle de pragas", "audience_size": 2500000},
-            {"id": "6003107779871", "name": "Jardinagem", "audience_size": 3100000},
-            {"id": "6003144912931", "name": "Vida ao ar livre", "audience_size": 4900000}
-        ],
-        "cupim": [
-            {"id": "6003232470561", "name": "Controle de pragas", "audience_size": 2500000},
-            {"id": "6003164953376", "name": "Manutenção residencial", "audience_size": 3200000},
-            {"id": "6003189204152", "name": "Arquitetura e design", "audience_size": 2900000},
-            {"id": "6003050931519", "name": "Melhorias para o lar", "audience_size": 5600000}
-        ],
-        "mosquito": [
-            {"id": "6003232470561", "name": "Controle de pragas", "audience_size": 2500000},
-            {"id": "6003107779871", "name": "Jardinagem", "audience_size": 3100000},
-            {"id": "6003130847622", "name": "Saúde e bem-estar", "audience_size": 12000000},
-            {"id": "6003144912931", "name": "Vida ao ar livre", "audience_size": 4900000},
-            {"id": "6003149840010", "name": "Atividades ao ar livre", "audience_size": 3900000}
-        ],
-        "escorpião": [
-            {"id": "6003232470561", "name": "Controle de pragas", "audience_size": 2500000},
-            {"id": "6003208575728", "name": "Saúde pública", "audience_size": 1200000},
-            {"id": "6003142268372", "name": "Segurança familiar", "audience_size": 2800000}
-        ],
-        "aranha": [
-            {"id": "6003232470561", "name": "Controle de pragas", "audience_size": 2500000},
-            {"id": "6003142268372", "name": "Segurança familiar", "audience_size": 2800000},
-            {"id": "6003150125934", "name": "Apartamentos e condomínios", "audience_size": 3700000}
-        ],
-        "residencial": [
-            {"id": "6003164953376", "name": "Manutenção residencial", "audience_size": 3200000},
-            {"id": "6002964951144", "name": "Proprietários de imóveis", "audience_size": 8500000},
-            {"id": "6003150125934", "name": "Apartamentos e condomínios", "audience_size": 3700000},
-            {"id": "6003020262976", "name": "Serviços residenciais", "audience_size": 5400000}
-        ],
-        "comercial": [
-            {"id": "6003158262642", "name": "Serviços empresariais", "audience_size": 4200000},
-            {"id": "6003206556718", "name": "Gestão de propriedades", "audience_size": 1800000},
-            {"id": "6003188467993", "name": "Pequenos negócios", "audience_size": 3400000},
-            {"id": "6003116452855", "name": "Restaurantes", "audience_size": 2700000}
-        ],
-        "condomínio": [
-            {"id": "6003150125934", "name": "Apartamentos e condomínios", "audience_size": 3700000},
-            {"id": "6003206556718", "name": "Gestão de propriedades", "audience_size": 1800000},
-            {"id": "6003164953376", "name": "Manutenção residencial", "audience_size": 3200000}
-        ],
-        "empresa": [
-            {"id": "6003158262642", "name": "Serviços empresariais", "audience_size": 4200000},
-            {"id": "6003188467993", "name": "Pequenos negócios", "audience_size": 3400000},
-            {"id": "6003142542397", "name": "Gestão empresarial", "audience_size": 2900000}
-        ],
-        "restaurante": [
-            {"id": "6003116452855", "name": "Restaurantes", "audience_size": 2700000},
-            {"id": "6003139192875", "name": "Indústria alimentícia", "audience_size": 3100000},
-            {"id": "6003158262642", "name": "Serviços empresariais", "audience_size": 4200000}
-        ],
-        "hotel": [
-            {"id": "6003179831999", "name": "Hotelaria", "audience_size": 2200000},
-            {"id": "6003103756568", "name": "Viagens", "audience_size": 7900000},
-            {"id": "6003158262642", "name": "Serviços empresariais", "audience_size": 4200000}
-        ],
-        "escola": [
-            {"id": "6003123570687", "name": "Educação", "audience_size": 6700000},
-            {"id": "6003109128422", "name": "Famílias com crianças", "audience_size": 6800000},
-            {"id": "6003158262642", "name": "Serviços empresariais", "audience_size": 4200000}
-        ],
-        "hospital": [
-            {"id": "6003130847622", "name": "Saúde e bem-estar", "audience_size": 12000000},
-            {"id": "6003208575728", "name": "Saúde pública", "audience_size": 1200000},
-            {"id": "6003172091531", "name": "Profissionais de saúde", "audience_size": 2500000}
-        ],
-        "indústria": [
-            {"id": "6003158262642", "name": "Serviços empresariais", "audience_size": 4200000},
-            {"id": "6003149622679", "name": "Manufatura", "audience_size": 1800000},
-            {"id": "6003178276101", "name": "Profissionais da indústria", "audience_size": 2200000}
-        ]
-    }
+    # Os dicionários são novos a cada chamada; o cache guarda apenas tuplas imutáveis
+    unique_interests = [
+        {"id": interest_id, "name": name, "audience_size": audience_size}
+        for interest_id, name, audience_size in _demo_interest_rows(query)
+    ]
     
-    # Gerar hash baseado na consulta para ter consistência na simulação
-    seed = int(hashlib.md5(query.encode()).hexdigest(), 16) % 1000
-    random.seed(seed)
+    logger.info(f"Gerados {len(unique_interests)} interesses para a consulta: {query}")
+    return unique_interests
+
+@functools.lru_cache(maxsize=512)
+def _demo_interest_rows(query: str) -> tuple:
+    """
+    Calcula as linhas (id, nome, tamanho do público) dos interesses de demonstração.
+    O resultado é determinístico para cada consulta e por isso fica em cache.
     
-    # Encontrar palavras-chave correspondentes
-    matching_interests = []
+    Args:
+        query (str): Consulta já convertida para minúsculas
+        
+    Returns:
+        tuple: Tuplas (id, nome, tamanho do público) ordenadas por tamanho
+    """
+    # Gerar hash baseado na consulta para ter consistência na simulação
+    seed = zlib.crc32(query.encode()) % 1000
+    rng = np.random.default_rng(seed)
     
-    # Verificar correspondências exatas
-    for key, interests in base_interests.items():
-        if key in query:
-            matching_interests.extend(interests)
+    # Encontrar palavras-chave correspondentes numa única varredura da consulta
+    matching_rows = [_KEYWORD_INDEX[key] for key in _match_keywords(query)]
     
     # Se não houver correspondências, usar lista padrão de dedetização
-    if not matching_interests:
-        matching_interests = base_interests["dedetização"]
+    if not matching_rows:
+        matching_rows.append(_KEYWORD_INDEX["dedetização"])
     
     # Remover duplicatas (mesmo ID)
-    seen_ids = set()
-    unique_interests = []
-    
-    for interest in matching_interests:
-        if interest["id"] not in seen_ids:
-            # Adicionar variação aleatória ao tamanho da audiência para tornar mais realista
-            variation = random.uniform(0.9, 1.1)
-            interest["audience_size"] = int(interest["audience_size"] * variation)
-            
-            unique_interests.append(interest)
-            seen_ids.add(interest["id"])
+    rows = np.unique(np.concatenate(matching_rows))
+    
+    # Adicionar variação aleatória ao tamanho da audiência para tornar mais realista
+    # (um único sorteio vetorizado, multiplicado no próprio buffer)
+    variation = rng.uniform(0.9, 1.1, rows.size)
+    variation *= _INTEREST_SIZES[rows]
+    sizes = variation.astype(np.int64)
+    
+    ids = _INTEREST_IDS[rows].tolist()
+    names = _INTEREST_NAMES[rows].tolist()
     
     # Adicionar alguns interesses específicos para a consulta
     if query != "dedetização":
         # Gerar um interesse personalizado com a consulta
-        custom_id = hashlib.md5(f"custom_{query}".encode()).hexdigest()[:16]
-        custom_interest = {
-            "id": custom_id,
-            "name": query.capitalize(),
-            "audience_size": random.randint(100000, 1000000)
-        }
-        unique_interests.append(custom_interest)
+        custom_id = hashlib.blake2b(f"custom_{query}".encode(), digest_size=8).hexdigest()
+        ids.append(custom_id)
+        names.append(query.capitalize())
+        sizes = np.append(sizes, rng.integers(100000, 1000000, endpoint=True))
     
-    # Ordenar por tamanho de audiência
-    unique_interests.sort(key=lambda x: x["audience_size"], reverse=True)
+    # Ordenar por tamanho de audiência (decrescente, mantendo a ordem dos empates)
+    order = np.argsort(-sizes, kind="stable").tolist()
+    sizes = sizes.tolist()
     
-    logger.info(f"Gerados {len(unique_interests)} interesses para a consulta: {query}")
-    return unique_interests
+    return tuple((ids[i], names[i], sizes[i]) for i in order)
 
+@functools.lru_cache(maxsize=4096)
 def get_audience_size_from_api(interest_id: str) -> int:
     """
     Consulta a API do Facebook para obter o tamanho real da audiência para um interesse.
@@ -236,6 +377,7 @@ def get_audience_size_from_api(interest_id: str) -> int:
         logger.error(f"Erro ao consultar tamanho de audiência: {str(e)}")
         return 0
 
+@functools.lru_cache(maxsize=4096)
 def get_simulated_audience_size(interest_name: str) -> int:
     """
     Gera um tamanho de público simulado para fins de desenvolvimento.
@@ -248,28 +390,122 @@ def get_simulated_audience_size(interest_name: str) -> int:
         int: Tamanho simulado do público
     """
     # Gerar seed baseado no nome para ter consistência
-    seed = int(hashlib.md5(interest_name.encode()).hexdigest(), 16) % 10000
-    random.seed(seed)
+    seed = zlib.crc32(interest_name.encode()) % 10000
+    rng = random.Random(seed)
     
     # Gerar tamanho de audiência baseado em algumas regras
-    if "proprietário" in interest_name.lower():
+    name = interest_name.lower()
+    
+    if "proprietário" in name:
         # Proprietários geralmente têm audiências grandes
-        base_size = random.randint(5000000, 10000000)
-    elif "serviço" in interest_name.lower():
+        base_size = rng.randint(5000000, 10000000)
+    elif "serviço" in name:
         # Serviços têm audiências médias
-        base_size = random.randint(2000000, 6000000)
-    elif "controle" in interest_name.lower() or "praga" in interest_name.lower():
+        base_size = rng.randint(2000000, 6000000)
+    elif "controle" in name or "praga" in name:
         # Controle de pragas tem audiência específica
-        base_size = random.randint(1000000, 3000000)
+        base_size = rng.randint(1000000, 3000000)
     else:
         # Outros interesses
-        base_size = random.randint(500000, 8000000)
+        base_size = rng.randint(500000, 8000000)
     
     # Adicionar variação aleatória
-    variation = random.uniform(0.85, 1.15)
+    variation = rng.uniform(0.85, 1.15)
     
     return int(base_size * variation)
 
+def _bucket_sizes(sizes, medium_threshold, large_threshold):
+    """
+    Classifica os tamanhos de público e soma o total com operações vetorizadas.
+    
+    Returns:
+        tuple: (segmento de cada interesse: 0 = específico, 1 = médio, 2 = grande, total)
+    """
+    buckets = np.digitize(sizes, [medium_threshold, large_threshold])
+    return buckets, sizes.sum().item()
+
+def _segment_interests(interests: List[Dict[str, Any]]) -> tuple:
+    """
+    Segmenta interesses já ordenados e calcula as estatísticas numa única passagem.
+    
+    Args:
+        interests (List[Dict]): Interesses com tamanho de público, em ordem decrescente
+        
+    Returns:
+        tuple: (segmentos, estatísticas)
+    """
+    # Definir limites para segmentação
+    large_threshold = 5000000   # > 5M = grande
+    medium_threshold = 1000000  # > 1M = médio, < 1M = específico
+    
+    # Tamanhos de público em um único array contíguo
+    sizes = np.array([interest.get("audience_size", 0) for interest in interests])
+    
+    # Segmentar interesses: 0 = específico, 1 = médio, 2 = grande
+    buckets, total_audience = _bucket_sizes(sizes, medium_threshold, large_threshold)
+    segments = {
+        "large": [interests[i] for i in np.flatnonzero(buckets == 2).tolist()],
+        "medium": [interests[i] for i in np.flatnonzero(buckets == 1).tolist()],
+        "specific": [interests[i] for i in np.flatnonzero(buckets == 0).tolist()]
+    }
+    
+    # Calcular estatísticas
+    total_interests = len(interests)
+    average_audience = total_audience / total_interests if total_interests > 0 else 0
+    
+    statistics = {
+        "total_interests": total_interests,
+        "total_audience": total_audience,
+        "average_audience": average_audience,
+        "segment_counts": {
+            "large": len(segments["large"]),
+            "medium": len(segments["medium"]),
+            "specific": len(segments["specific"])
+        }
+    }
+    
+    return segments, statistics
+
+def _build_analysis(segments: Dict[str, List[Dict]], statistics: Dict) -> Dict:
+    """
+    Monta o resultado da análise a partir dos segmentos e estatísticas.
+    
+    Args:
+        segments (Dict): Interesses segmentados por tamanho de público
+        statistics (Dict): Estatísticas calculadas para os interesses
+        
+    Returns:
+        Dict: Resultados da análise e segmentação
+    """
+    # Preparar recomendações
+    recommendations = []
+    
+    if segments["large"] and segments["specific"]:
+        recommendations.append("Combine interesses amplos com específicos para equilibrar alcance e relevância")
+    
+    if len(segments["specific"]) >= 3:
+        recommendations.append("Use múltiplos interesses específicos para criar uma audiência mais qualificada")
+    
+    if len(segments["large"]) > 2 and not segments["specific"]:
+        recommendations.append("Audiência muito ampla. Adicione interesses mais específicos para melhorar a relevância")
+    
+    if not segments["medium"] and not segments["specific"]:
+        recommendations.append("Audiência muito genérica. Busque interesses mais específicos para o setor de controle de pragas")
+    
+    total_interests = statistics["total_interests"]
+    
+    # Resultado final
+    result = {
+        "status": "success",
+        "message": f"Análise concluída para {total_interests} interesses",
+        "statistics": statistics,
+        "segments": segments,
+        "recommendations": recommendations
+    }
+    
+    logger.info(f"Análise de interesses concluída: {total_interests} interesses processados")
+    return result
+
 def analyze_interests(interests: List[Dict[str, Any]]) -> Dict:
     """
     Analisa e segmenta interesses baseados no tamanho do público.
@@ -305,67 +541,8 @@ def analyze_interests(interests: List[Dict[str, Any]]) -> Dict:
         # Ordenar por tamanho de audiência (decrescente)
         interests_with_size.sort(key=lambda x: x.get("audience_size", 0), reverse=True)
         
-        # Definir limites para segmentação
-        large_threshold = 5000000   # > 5M = grande
-        medium_threshold = 1000000  # > 1M = médio, < 1M = específico
-        
-        # Segmentar interesses
-        segments = {
-            "large": [],
-            "medium": [],
-            "specific": []
-        }
-        
-        for interest in interests_with_size:
-            audience_size = interest.get("audience_size", 0)
-            
-            if audience_size >= large_threshold:
-                segments["large"].append(interest)
-            elif audience_size >= medium_threshold:
-                segments["medium"].append(interest)
-            else:
-                segments["specific"].append(interest)
-        
-        # Calcular estatísticas
-        total_interests = len(interests_with_size)
-        total_audience = sum(interest.get("audience_size", 0) for interest in interests_with_size)
-        average_audience = total_audience / total_interests if total_interests > 0 else 0
-        
-        # Preparar recomendações
-        recommendations = []
-        
-        if segments["large"] and segments["specific"]:
-            recommendations.append("Combine interesses amplos com específicos para equilibrar alcance e relevância")
-        
-        if len(segments["specific"]) >= 3:
-            recommendations.append("Use múltiplos interesses específicos para criar uma audiência mais qualificada")
-        
-        if len(segments["large"]) > 2 and not segments["specific"]:
-            recommendations.append("Audiência muito ampla. Adicione interesses mais específicos para melhorar a relevância")
-        
-        if not segments["medium"] and not segments["specific"]:
-            recommendations.append("Audiência muito genérica. Busque interesses mais específicos para o setor de controle de pragas")
-        
-        # Resultado final
-        result = {
-            "status": "success",
-            "message": f"Análise concluída para {total_interests} interesses",
-            "statistics": {
-                "total_interests": total_interests,
-                "total_audience": total_audience,
-                "average_audience": average_audience,
-                "segment_counts": {
-                    "large": len(segments["large"]),
-                    "medium": len(segments["medium"]),
-                    "specific": len(segments["specific"])
-                }
-            },
-            "segments": segments,
-            "recommendations": recommendations
-        }
-        
-        logger.info(f"Análise de interesses concluída: {total_interests} interesses processados")
-        return result
+        segments, statistics = _segment_interests(interests_with_size)
+        return _build_analysis(segments, statistics)
         
     except Exception as e:
         logger.error(f"Erro ao analisar interesses: {str(e)}")
@@ -375,6 +552,26 @@ def analyze_interests(interests: List[Dict[str, Any]]) -> Dict:
             "segments": {}
         }
 
+def _build_interests(query: str) -> tuple:
+    """
+    Obtém os interesses da consulta já segmentados, sem reordenar nem reprocessar a lista.
+    Os interesses de demonstração já chegam com tamanho de público e ordenados.
+    
+    Args:
+        query (str): Palavra-chave para buscar interesses relacionados
+        
+    Returns:
+        tuple: (interesses, segmentos, estatísticas); segmentos e estatísticas são None
+        quando a consulta retorna erro ou nenhum interesse
+    """
+    interests = get_interests(query)
+    
+    if isinstance(interests, dict) or not interests:
+        return interests, None, None
+    
+    segments, statistics = _segment_interests(interests)
+    return interests, segments, statistics
+
 def get_recommended_interests(query: str = "dedetização") -> Dict:
     """
     Obtém e analisa interesses recomendados para uma campanha.
@@ -386,8 +583,8 @@ def get_recommended_interests(query: str = "dedetização") -> Dict:
         Dict: Interesses recomendados com análise
     """
     try:
-        # Obter interesses
-        interests = get_interests(query)
+        # Obter interesses já segmentados
+        interests, segments, statistics = _build_interests(query)
         
         # Se for um dicionário com erro, retornar erro
         if isinstance(interests, dict) and "error" in interests:
@@ -397,78 +594,45 @@ def get_recommended_interests(query: str = "dedetização") -> Dict:
                 "recommendations": []
             }
         
+        # Sem interesses não há o que analisar nem combinar
+        if not interests:
+            return {
+                "status": "warning",
+                "message": "Não foi possível gerar recomendações para esta consulta",
+                "query": query,
+                "analysis": {
+                    "status": "error",
+                    "message": "Nenhum interesse fornecido para análise",
+                    "segments": {}
+                },
+                "recommendations": []
+            }
+        
         # Analisar interesses
-        analysis = analyze_interests(interests)
+        analysis = _build_analysis(segments, statistics)
         
         # Preparar recomendações específicas para o setor de dedetização
         recommended_combinations = []
         
         # Tentar criar combinações equilibradas
-        if analysis["status"] == "success":
-            segments = analysis["segments"]
-            
-            # Combinação 1: Mistura equilibrada
-            combination1 = {
-                "name": "Equilibrada: Alcance com Relevância",
-                "description": "Combina interesses amplos com específicos para maximizar alcance com relevância",
-                "interests": []
-            }
-            
-            # Adicionar 1 interesse amplo
-            if segments["large"]:
-                combination1["interests"].append(segments["large"][0])
-            
-            # Adicionar 1-2 interesses médios
-            if segments["medium"]:
-                for i in range(min(2, len(segments["medium"]))):
-                    combination1["interests"].append(segments["medium"][i])
-            
-            # Adicionar 1-2 interesses específicos
-            if segments["specific"]:
-                for i in range(min(2, len(segments["specific"]))):
-                    combination1["interests"].append(segments["specific"][i])
-            
-            # Combinação 2: Foco em relevância
-            combination2 = {
-                "name": "Relevância: Audiência Qualificada",
-                "description": "Foca em interesses específicos do setor para uma audiência mais qualificada",
-                "interests": []
-            }
-            
-            # Adicionar interesses específicos e médios
-            specific_count = min(3, len(segments["specific"]))
-            for i in range(specific_count):
-                if i < len(segments["specific"]):
-                    combination2["interests"].append(segments["specific"][i])
-            
-            # Se não tiver muitos específicos, adicionar médios
-            if specific_count < 3 and segments["medium"]:
-                for i in range(min(3 - specific_count, len(segments["medium"]))):
-                    combination2["interests"].append(segments["medium"][i])
-            
-            # Combinação 3: Alcance máximo
-            combination3 = {
-                "name": "Alcance: Máxima Exposição",
-                "description": "Prioriza o alcance amplo para maximizar a exposição da marca",
-                "interests": []
-            }
-            
-            # Adicionar interesses amplos e médios
-            if segments["large"]:
-                for i in range(min(2, len(segments["large"]))):
-                    combination3["interests"].append(segments["large"][i])
-            
-            if segments["medium"]:
-                for i in range(min(2, len(segments["medium"]))):
-                    combination3["interests"].append(segments["medium"][i])
-            
-            # Adicionar combinações não vazias
-            if combination1["interests"]:
-                recommended_combinations.append(combination1)
-            if combination2["interests"]:
-                recommended_combinations.append(combination2)
-            if combination3["interests"]:
-                recommended_combinations.append(combination3)
+        if any(segments.values()):
+            for name, description, picks, limit in _COMBO_SPECS:
+                # Até `count` interesses de cada segmento, na ordem da especificação
+                selected = [
+                    interest
+                    for segment, count in picks
+                    for interest in segments[segment][:count]
+                ]
+                if limit is not None:
+                    selected = selected[:limit]
+                
+                # Adicionar combinações não vazias
+                if selected:
+                    recommended_combinations.append({
+                        "name": name,
+                        "description": description,
+                        "interests": selected
+                    })
         
         # Resultado final
         result = {
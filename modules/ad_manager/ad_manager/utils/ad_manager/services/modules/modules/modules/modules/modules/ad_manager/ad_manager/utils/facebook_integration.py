@@ -2,9 +2,16 @@ import os
 import logging
 import json
 import random
-import pandas as pd
+import asyncio
+import copy
+import time
+import functools
+import warnings
+import numpy as np
+from dataclasses import asdict, dataclass
+from types import MappingProxyType
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
+from typing import NamedTuple, Optional, TypedDict
 
 # Tentar importar a biblioteca do Facebook se estiver disponível
 try:
@@ -15,29 +22,418 @@ try:
     FB_API_AVAILABLE = True
 except ImportError:
     FB_API_AVAILABLE = False
-    
-# Carregar variáveis de ambiente
-load_dotenv()
+
+# Tentar importar o aiohttp para consultas assíncronas se estiver disponível
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+# Tentar importar o diskcache para o cache local de respostas se estiver disponível
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
 
 # Configuração de logging
 logger = logging.getLogger(__name__)
 
+# Endpoint da Graph API usado nas consultas assíncronas
+GRAPH_API_URL = "https://graph.facebook.com/v19.0"
+
+# Campos de insights obtidos da API
+INSIGHT_FIELDS = [
+    'campaign_name', 'impressions', 'clicks', 'spend', 'actions',
+    'ctr', 'cpc', 'reach', 'frequency', 'cost_per_action_type'
+]
+
+# Colunas do DataFrame de desempenho, na ordem em que são retornadas
+_PERF_FIELDS = (
+    'date', 'campaign_id', 'campaign_name', 'impressions', 'clicks', 'spend', 'ctr', 'cpc',
+    'conversions', 'day_of_week', 'month', 'cpa', 'conversion_rate'
+)
+
+# Uso (%) da cota da API a partir do qual as requisições assíncronas aguardam
+RATE_LIMIT_THRESHOLD = 90
+
+# Cache local das respostas de contas e campanhas, no diretório de cache do usuário
+# (não em um diretório temporário compartilhado, pois o diskcache usa pickle)
+CACHE_DIR = os.path.join(
+    os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'lion', 'fb_cache'
+)
+CACHE_TTL = 600  # Segundos
+
+# Cache em memória usado quando o diskcache não está disponível: {chave: (expiração, valor)}
+_memory_cache = {}
+
+# Geradores aleatórios compartilhados pela simulação
+_PY_RNG = random.Random()
+_NP_RNG = np.random.default_rng()
+
+# Dados simulados de contas de anúncios
+_SIM_ACCOUNTS = (
+    MappingProxyType({
+        'id': 'act_12345678',
+        'name': 'Lion Dedetizadora - Principal',
+        'account_status': 1,  # 1 = ativo
+        'amount_spent': 1250.75
+    }),
+    MappingProxyType({
+        'id': 'act_23456789',
+        'name': 'Lion Dedetizadora - Testes',
+        'account_status': 1,
+        'amount_spent': 350.50
+    })
+)
+
+# Dados simulados de campanhas (datas de criação calculadas uma vez, na importação)
+_SIM_NOW = datetime.now()
+_SIM_CAMPAIGNS = (
+    MappingProxyType({
+        'id': '1001001001001',
+        'name': 'Dedetização Residencial - Conversões',
+        'objective': 'CONVERSIONS',
+        'status': 'ACTIVE',
+        'daily_budget': 1000,  # Em centavos
+        'created_time': (_SIM_NOW - timedelta(days=30)).strftime('%Y-%m-%d')
+    }),
+    MappingProxyType({
+        'id': '1001001001002',
+        'name': 'Dedetização Comercial - Tráfego',
+        'objective': 'TRAFFIC',
+        'status': 'ACTIVE',
+        'daily_budget': 1500,
+        'created_time': (_SIM_NOW - timedelta(days=15)).strftime('%Y-%m-%d')
+    }),
+    MappingProxyType({
+        'id': '1001001001003',
+        'name': 'Descupinização - Reconhecimento',
+        'objective': 'AWARENESS',
+        'status': 'PAUSED',
+        'daily_budget': 800,
+        'created_time': (_SIM_NOW - timedelta(days=45)).strftime('%Y-%m-%d')
+    })
+)
+del _SIM_NOW
+
+@functools.cache
+def _load_env():
+    """
+    Carrega as variáveis de ambiente do arquivo .env (apenas na primeira chamada)
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+
+@functools.cache
+def _disk_cache():
+    """
+    Abre o cache em disco uma única vez por processo, em um diretório acessível apenas ao usuário
+    """
+    os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+    return diskcache.Cache(CACHE_DIR)
+
+@functools.lru_cache(maxsize=256)
+def _campaign_obj(campaign_id):
+    """
+    Retorna o objeto Campaign do SDK para o ID, reutilizando objetos já criados
+    """
+    return Campaign(campaign_id)
+
+def _to_cents(budget, budget_cents):
+    """
+    Converte o orçamento para centavos inteiros (sem orçamento, retorna 0)
+    
+    Args:
+        budget (float): Orçamento em reais (obsoleto, use budget_cents)
+        budget_cents (int): Orçamento em centavos
+        
+    Returns:
+        int: Orçamento em centavos
+    """
+    if budget_cents is not None:
+        return int(budget_cents)
+    
+    if budget is None:
+        return 0
+    
+    warnings.warn(
+        "Informar o orçamento em reais está obsoleto; use o argumento budget_cents",
+        DeprecationWarning,
+        stacklevel=3
+    )
+    return round(budget * 100)
+
+# Indica se o SDK do Facebook já foi inicializado neste processo
+_sdk_initialized = False
+
+class FBEnv(NamedTuple):
+    """
+    Credenciais do Facebook lidas do ambiente
+    """
+    token: Optional[str]
+    acct: Optional[str]
+    acct_fbid: Optional[str]  # ID da conta no formato 'act_<id>'
+
+@functools.lru_cache(maxsize=1)
+def _fb_env():
+    """
+    Lê as credenciais do Facebook do ambiente (apenas uma vez por processo)
+    """
+    _load_env()
+    token = os.environ.get('FB_ACCESS_TOKEN')
+    acct = os.environ.get('FB_ACCOUNT_ID')
+    return FBEnv(token, acct, f'act_{acct}' if acct else None)
+
+# Tamanho mínimo da grade (campanhas x dias) para usar o kernel do Numba na simulação;
+# abaixo disso a versão vetorizada é mais rápida que a compilação
+NUMBA_MIN_CELLS = 100000
+
+def _daily_metrics_loop(bases, day_factor, trend_factor, noise):
+    """
+    Calcula as métricas diárias simuladas campanha a campanha (kernel compilado pelo Numba).
+    
+    Args:
+        bases (np.ndarray): Matriz (n_campanhas, 5) com impressões, CTR, CPC,
+                            taxa de conversão e orçamento base de cada campanha
+        day_factor (np.ndarray): Fator de cada dia
+        trend_factor (np.ndarray): Tendência de cada dia
+        noise (np.ndarray): Matriz (n_campanhas, n_dias) de ruído aleatório
+        
+    Returns:
+        tuple: Arrays (impressions, clicks, ctr, cpc, spend, conversions) de tamanho
+               n_campanhas * n_dias, com os dias de cada campanha em sequência
+    """
+    n_campaigns, n_days = noise.shape
+    size = n_campaigns * n_days
+    impressions = np.empty(size, dtype=np.int64)
+    clicks = np.empty(size, dtype=np.int64)
+    ctr = np.empty(size, dtype=np.float64)
+    cpc = np.empty(size, dtype=np.float64)
+    spend = np.empty(size, dtype=np.float64)
+    conversions = np.empty(size, dtype=np.int64)
+    
+    for c in range(n_campaigns):
+        base_impressions, base_ctr, base_cpc, base_conv_rate, base_budget = (
+            bases[c, 0], bases[c, 1], bases[c, 2], bases[c, 3], bases[c, 4]
+        )
+        for d in range(n_days):
+            i = c * n_days + d
+            impressions[i] = int(base_impressions * day_factor[d] * trend_factor[d] * noise[c, d])
+            ctr[i] = base_ctr * day_factor[d] * noise[c, d]
+            clicks[i] = int((ctr[i] / 100) * impressions[i])
+            cpc[i] = base_cpc * noise[c, d]
+            spend[i] = min(round(clicks[i] * cpc[i], 2), base_budget)
+            conversions[i] = int((base_conv_rate * noise[c, d] / 100) * clicks[i])
+    
+    return impressions, clicks, ctr, cpc, spend, conversions
+
+@functools.cache
+def _numba_daily_metrics():
+    """
+    Importa o Numba e compila o kernel da simulação apenas na primeira grade grande
+    
+    Returns:
+        function: Kernel compilado, ou None se o Numba não estiver disponível
+    """
+    try:
+        from numba import njit
+    except ImportError:
+        return None
+    return njit(cache=True)(_daily_metrics_loop)
+
+def _simulate_daily_metrics(bases, day_factor, trend_factor, noise):
+    """
+    Calcula as métricas diárias simuladas de todas as campanhas.
+    Grades pequenas usam operações vetorizadas; a partir de NUMBA_MIN_CELLS
+    usa o kernel do Numba, se disponível.
+    
+    Args:
+        bases (np.ndarray): Matriz (n_campanhas, 5) com impressões, CTR, CPC,
+                            taxa de conversão e orçamento base de cada campanha
+        day_factor (np.ndarray): Fator de cada dia
+        trend_factor (np.ndarray): Tendência de cada dia
+        noise (np.ndarray): Matriz (n_campanhas, n_dias) de ruído aleatório
+        
+    Returns:
+        tuple: Arrays (impressions, clicks, ctr, cpc, spend, conversions) de tamanho
+               n_campanhas * n_dias, com os dias de cada campanha em sequência
+    """
+    if noise.size >= NUMBA_MIN_CELLS:
+        kernel = _numba_daily_metrics()
+        if kernel is not None:
+            return kernel(bases, day_factor, trend_factor, noise)
+    
+    base_impressions, base_ctr, base_cpc, base_conv_rate, base_budget = (
+        bases[:, column, np.newaxis] for column in range(5)
+    )
+    
+    impressions = (base_impressions * day_factor * trend_factor * noise).astype(np.int64)
+    ctr = base_ctr * day_factor * noise
+    clicks = ((ctr / 100) * impressions).astype(np.int64)
+    cpc = base_cpc * noise
+    
+    # Limite de gasto diário
+    spend = np.minimum(np.round(clicks * cpc, 2), base_budget)
+    
+    # Conversões
+    conversions = ((base_conv_rate * noise / 100) * clicks).astype(np.int64)
+    
+    return tuple(values.ravel() for values in (impressions, clicks, ctr, cpc, spend, conversions))
+
+class InsightsColumns(TypedDict):
+    """
+    Insights diários em formato de colunas (um array por campo)
+    """
+    date_start: np.ndarray        # datetime64[D]
+    campaign_id: np.ndarray       # object (str)
+    campaign_name: np.ndarray     # object (str)
+    impressions: np.ndarray       # int64
+    clicks: np.ndarray            # int64
+    ctr: np.ndarray               # float64
+    cpc: np.ndarray               # float64
+    spend: np.ndarray             # float64
+    reach: np.ndarray             # int64
+    conversions: np.ndarray       # int64 (ações do tipo 'lead')
+    page_engagement: np.ndarray   # int64
+    landing_page_view: np.ndarray # int64
+
+@dataclass(slots=True, frozen=True)
+class CampaignInsight:
+    """
+    Insight diário de uma campanha, mais leve que um dicionário para listas grandes
+    """
+    date_start: str
+    campaign_id: str
+    campaign_name: str
+    impressions: int
+    clicks: int
+    ctr: float
+    cpc: float
+    spend: float
+    conversions: int
+    
+    def to_dict(self):
+        """
+        Converte o insight em dicionário
+        """
+        return asdict(self)
+
+def insights_to_columns(insights):
+    """
+    Converte uma lista de insights (dicionários) para o formato de colunas
+    Os valores numéricos da API chegam como texto e são convertidos aqui
+    """
+    # Uma lista por campo, preenchidas em uma única passagem pelos insights
+    cols = {field: [] for field in InsightsColumns.__annotations__}
+    
+    for insight in insights:
+        actions = insight.get('actions_data', {})
+        cols['date_start'].append(insight['date_start'])
+        cols['campaign_id'].append(insight['campaign_id'])
+        cols['campaign_name'].append(insight['campaign_name'])
+        cols['impressions'].append(int(insight['impressions']))
+        cols['clicks'].append(int(insight['clicks']))
+        cols['ctr'].append(float(insight['ctr']))
+        cols['cpc'].append(float(insight['cpc']))
+        cols['spend'].append(float(insight['spend']))
+        cols['reach'].append(int(insight.get('reach', 0)))
+        cols['conversions'].append(int(actions.get('lead', 0)))
+        cols['page_engagement'].append(int(actions.get('page_engagement', 0)))
+        cols['landing_page_view'].append(int(actions.get('landing_page_view', 0)))
+    
+    # Converter cada data distinta apenas uma vez (as mesmas datas se repetem entre campanhas)
+    unique_dates, date_index = np.unique(np.array(cols['date_start'], dtype=str), return_inverse=True)
+    
+    return InsightsColumns(
+        date_start=unique_dates.astype('datetime64[D]')[date_index],
+        campaign_id=np.array(cols['campaign_id'], dtype=object),
+        campaign_name=np.array(cols['campaign_name'], dtype=object),
+        impressions=np.array(cols['impressions'], dtype=np.int64),
+        clicks=np.array(cols['clicks'], dtype=np.int64),
+        ctr=np.array(cols['ctr'], dtype=np.float64),
+        cpc=np.array(cols['cpc'], dtype=np.float64),
+        spend=np.array(cols['spend'], dtype=np.float64),
+        reach=np.array(cols['reach'], dtype=np.int64),
+        conversions=np.array(cols['conversions'], dtype=np.int64),
+        page_engagement=np.array(cols['page_engagement'], dtype=np.int64),
+        landing_page_view=np.array(cols['landing_page_view'], dtype=np.int64)
+    )
+
+def iter_campaign_insights(columns):
+    """
+    Percorre insights em formato de colunas como objetos CampaignInsight
+    """
+    rows = zip(
+        columns['date_start'].astype(str).tolist(), columns['campaign_id'].tolist(),
+        columns['campaign_name'].tolist(), columns['impressions'].tolist(),
+        columns['clicks'].tolist(), columns['ctr'].tolist(), columns['cpc'].tolist(),
+        columns['spend'].tolist(), columns['conversions'].tolist()
+    )
+    
+    for row in rows:
+        yield CampaignInsight(*row)
+
+def iter_insight_dicts(columns):
+    """
+    Percorre insights em formato de colunas como dicionários, no formato de get_campaign_insights
+    """
+    dates = columns['date_start'].astype(str).tolist()
+    rows = zip(
+        dates, columns['campaign_id'].tolist(), columns['campaign_name'].tolist(),
+        columns['impressions'].tolist(), columns['clicks'].tolist(), columns['ctr'].tolist(),
+        columns['cpc'].tolist(), columns['spend'].tolist(), columns['reach'].tolist(),
+        columns['conversions'].tolist(), columns['page_engagement'].tolist(),
+        columns['landing_page_view'].tolist()
+    )
+    
+    for (date, campaign_id, campaign_name, impressions, clicks, ctr, cpc, spend,
+         reach, conversions, page_engagement, landing_page_views) in rows:
+        yield {
+            'date_start': date,
+            'date_stop': date,
+            'campaign_id': campaign_id,
+            'campaign_name': campaign_name,
+            'impressions': impressions,
+            'clicks': clicks,
+            'ctr': ctr,
+            'cpc': cpc,
+            'spend': spend,
+            'reach': reach,
+            'frequency': 1.25,  # Média de 1.25 impressões por pessoa
+            'actions_data': {
+                'lead': conversions,
+                'page_engagement': page_engagement,
+                'landing_page_view': landing_page_views
+            }
+        }
+
 class FacebookAdsAPI:
     """
     Classe para interagir com a API de anúncios do Facebook
     """
     def __init__(self):
-        self.access_token = os.environ.get('FB_ACCESS_TOKEN')
-        self.account_id = os.environ.get('FB_ACCOUNT_ID')
+        env = _fb_env()
+        self.access_token = env.token
+        self.account_id = env.acct
         self.api_initialized = False
+        self._cache = None
         
         # Inicializar API se credenciais estiverem disponíveis
         if self.access_token and self.account_id and FB_API_AVAILABLE:
             try:
-                FacebookAdsApi.init(self.access_token)
-                self.account = AdAccount('act_' + self.account_id)
+                global _sdk_initialized
+                if not _sdk_initialized:
+                    FacebookAdsApi.init(self.access_token)
+                    _sdk_initialized = True
+                self.account = AdAccount(env.acct_fbid)
                 self.api_initialized = True
                 logger.info("API do Facebook inicializada com sucesso")
+                
+                if DISKCACHE_AVAILABLE:
+                    self._cache = _disk_cache()
             except Exception as e:
                 logger.error(f"Erro ao inicializar API do Facebook: {str(e)}")
                 self.api_initialized = False
@@ -47,6 +443,52 @@ class FacebookAdsAPI:
             else:
                 logger.warning("Credenciais do Facebook não estão configuradas. Usando dados simulados.")
     
+    def _cache_key(self, method):
+        """
+        Gera a chave de cache para um método desta conta de anúncios
+        """
+        return f"{self.account_id}:{method}"
+    
+    def _cache_get(self, method):
+        """
+        Obtém a resposta em cache de um método, ou None se não houver ou tiver expirado
+        """
+        key = self._cache_key(method)
+        
+        if self._cache is not None:
+            return self._cache.get(key)
+        
+        entry = _memory_cache.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        
+        # Cópia para que alterações do chamador não afetem o cache
+        return copy.deepcopy(entry[1])
+    
+    def _cache_set(self, method, value, ttl=CACHE_TTL):
+        """
+        Armazena a resposta de um método no cache por `ttl` segundos
+        """
+        key = self._cache_key(method)
+        
+        if self._cache is not None:
+            self._cache.set(key, value, expire=ttl)
+        else:
+            _memory_cache[key] = (time.monotonic() + ttl, copy.deepcopy(value))
+    
+    def invalidate(self, method=None):
+        """
+        Remove do cache a resposta de um método, ou de todos os métodos se nenhum for informado
+        """
+        methods = [method] if method else ['get_ad_accounts', 'get_campaigns']
+        
+        for name in methods:
+            key = self._cache_key(name)
+            if self._cache is not None:
+                self._cache.delete(key)
+            else:
+                _memory_cache.pop(key, None)
+    
     def check_connection(self):
         """
         Verifica se a conexão com a API do Facebook está funcionando
@@ -72,11 +514,17 @@ class FacebookAdsAPI:
             logger.warning("API do Facebook não inicializada. Usando dados simulados.")
             return self._simulate_accounts()
         
+        # Usar resposta em cache se ainda for válida
+        cached = self._cache_get('get_ad_accounts')
+        if cached is not None:
+            return cached
+        
         try:
             # Tentar obter contas de anúncios
             accounts = self.account.get_ad_accounts(fields=['name', 'account_status', 'amount_spent'])
             accounts_data = [account.export_data() for account in accounts]
             logger.info(f"Obtidas {len(accounts_data)} contas de anúncios")
+            self._cache_set('get_ad_accounts', accounts_data)
             return accounts_data
         except Exception as e:
             logger.error(f"Erro ao obter contas de anúncios: {str(e)}")
@@ -90,6 +538,11 @@ class FacebookAdsAPI:
             logger.warning("API do Facebook não inicializada. Usando dados simulados.")
             return self._simulate_campaigns()
         
+        # Usar resposta em cache se ainda for válida
+        cached = self._cache_get('get_campaigns')
+        if cached is not None:
+            return cached
+        
         try:
             # Tentar obter campanhas
             campaigns = self.account.get_campaigns(fields=[
@@ -99,6 +552,7 @@ class FacebookAdsAPI:
             
             campaigns_data = [campaign.export_data() for campaign in campaigns]
             logger.info(f"Obtidas {len(campaigns_data)} campanhas")
+            self._cache_set('get_campaigns', campaigns_data)
             return campaigns_data
         except Exception as e:
             logger.error(f"Erro ao obter campanhas: {str(e)}")
@@ -120,14 +574,11 @@ class FacebookAdsAPI:
             }
             
             # Definir campos a serem obtidos
-            fields = [
-                'campaign_name', 'impressions', 'clicks', 'spend', 'actions',
-                'ctr', 'cpc', 'reach', 'frequency', 'cost_per_action_type'
-            ]
+            fields = INSIGHT_FIELDS
             
             # Obter insights para uma campanha específica ou todas
             if campaign_id:
-                campaign = Campaign(campaign_id)
+                campaign = _campaign_obj(campaign_id)
                 insights = campaign.get_insights(fields=fields, params=params)
                 logger.info(f"Obtidos insights para a campanha {campaign_id}")
             else:
@@ -135,32 +586,212 @@ class FacebookAdsAPI:
                 logger.info("Obtidos insights para todas as campanhas")
             
             # Processar dados de insights
-            insights_data = []
+            return [self._export_insight(insight) for insight in insights]
+        except Exception as e:
+            logger.error(f"Erro ao obter insights: {str(e)}")
+            return self._simulate_campaign_insights(campaign_id)
+    
+    def get_campaigns_insights_bulk(self, campaign_ids, date_preset="last_30_days"):
+        """
+        Obtém insights de várias campanhas com uma única requisição à conta
+        Prefira este método a chamar get_campaign_insights em um loop
+        
+        Args:
+            campaign_ids (list): IDs das campanhas
+            date_preset (str): Período dos dados
+            
+        Returns:
+            dict: {campaign_id: lista de insights}
+        """
+        campaign_ids = list(campaign_ids)
+        
+        if not self.api_initialized:
+            logger.warning("API do Facebook não inicializada. Usando dados simulados.")
+            return {campaign_id: self._simulate_campaign_insights(campaign_id) for campaign_id in campaign_ids}
+        
+        grouped = {campaign_id: [] for campaign_id in campaign_ids}
+        if not campaign_ids:
+            return grouped
+        
+        try:
+            params = {
+                'date_preset': date_preset,
+                'time_increment': 1,  # Dados diários
+                'level': 'campaign',
+                'filtering': [{'field': 'campaign.id', 'operator': 'IN', 'value': campaign_ids}]
+            }
+            # A API retorna apenas os campos pedidos; campaign_id é necessário para agrupar
+            insights = self.account.get_insights(fields=['campaign_id', *INSIGHT_FIELDS], params=params)
+            
+            # Agrupar as linhas retornadas por campanha
             for insight in insights:
-                # Extrair ações (conversões) se disponíveis
-                actions = {}
-                if 'actions' in insight:
-                    for action in insight['actions']:
-                        action_type = action['action_type']
-                        actions[action_type] = action['value']
+                data = self._export_insight(insight)
+                grouped.setdefault(data['campaign_id'], []).append(data)
+            
+            logger.info(f"Obtidos insights para {len(campaign_ids)} campanhas em uma única requisição")
+            return grouped
+        except Exception as e:
+            logger.error(f"Erro ao obter insights em lote: {str(e)}")
+            return {campaign_id: self._simulate_campaign_insights(campaign_id) for campaign_id in campaign_ids}
+    
+    @staticmethod
+    def _export_insight(insight):
+        """
+        Converte um insight da API em dicionário, com as ações em 'actions_data'
+        """
+        # Criar entrada de dados, com as ações (conversões) indexadas por tipo
+        data = insight.export_data()
+        data['actions_data'] = {action['action_type']: action['value'] for action in data.get('actions', ())}
+        return data
+    
+    def get_campaign_insights_columns(self, campaign_id=None, date_preset="last_30_days"):
+        """
+        Obtém insights de desempenho no formato de colunas (InsightsColumns)
+        Os dados simulados são gerados diretamente em colunas, sem dicionários intermediários
+        """
+        if not self.api_initialized:
+            logger.warning("API do Facebook não inicializada. Usando dados simulados.")
+            return self._simulate_campaign_insights_columnar(campaign_id)
+        
+        return insights_to_columns(self.get_campaign_insights(campaign_id, date_preset))
+    
+    def get_campaign_insight_records(self, campaign_id=None, date_preset="last_30_days"):
+        """
+        Obtém insights de desempenho como objetos CampaignInsight
+        Indicado para quem percorre os insights sem montar um DataFrame
+        """
+        return list(iter_campaign_insights(self.get_campaign_insights_columns(campaign_id, date_preset)))
+    
+    def get_campaign_insights_concurrent(self, campaign_ids, date_preset="last_30_days"):
+        """
+        Obtém insights de várias campanhas com requisições simultâneas
+        Retorna um dicionário {campaign_id: lista de insights}
+        """
+        return asyncio.run(self.aget_campaign_insights(campaign_ids, date_preset))
+    
+    async def aget_campaign_insights(self, campaign_ids, date_preset="last_30_days", max_concurrency=10):
+        """
+        Versão assíncrona de get_campaign_insights para várias campanhas
+        As requisições são feitas em paralelo, limitadas por um semáforo
+        """
+        if not self.api_initialized:
+            logger.warning("API do Facebook não inicializada. Usando dados simulados.")
+            return {campaign_id: self._simulate_campaign_insights(campaign_id) for campaign_id in campaign_ids}
+        
+        if not AIOHTTP_AVAILABLE:
+            logger.warning("aiohttp não está disponível. Consultando campanhas em lote.")
+            return self.get_campaigns_insights_bulk(campaign_ids, date_preset)
+        
+        # Definir parâmetros
+        params = {
+            'fields': ','.join(INSIGHT_FIELDS),
+            'date_preset': date_preset,
+            'time_increment': '1'  # Dados diários
+        }
+        
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        # Token no cabeçalho, para não aparecer nas URLs incluídas nas mensagens de erro
+        headers = {'Authorization': f"Bearer {self.access_token}"}
+        
+        async with aiohttp.ClientSession(headers=headers) as session:
+            results = await asyncio.gather(*[
+                self._afetch_campaign_insights(session, semaphore, campaign_id, params)
+                for campaign_id in campaign_ids
+            ])
+        
+        logger.info(f"Obtidos insights para {len(campaign_ids)} campanhas")
+        return dict(zip(campaign_ids, results))
+    
+    async def _afetch_campaign_insights(self, session, semaphore, campaign_id, params):
+        """
+        Obtém todas as páginas de insights de uma campanha pela Graph API
+        """
+        url = f"{GRAPH_API_URL}/{campaign_id}/insights"
+        request_params = params
+        insights_data = []
+        
+        try:
+            while url:
+                async with semaphore:
+                    async with session.get(url, params=request_params) as response:
+                        payload = await response.json()
+                        delay = self._rate_limit_delay(response.headers)
+                    
+                    # Aguardar antes de liberar o semáforo se a cota estiver perto do limite
+                    if delay:
+                        logger.warning(f"Uso da API do Facebook próximo do limite. Aguardando {delay:.0f}s")
+                        await asyncio.sleep(delay)
+                
+                if 'error' in payload:
+                    raise RuntimeError(payload['error'].get('message', payload['error']))
+                
+                for data in payload.get('data', []):
+                    # Extrair ações (conversões) se disponíveis
+                    data['actions_data'] = {
+                        action['action_type']: action['value'] for action in data.get('actions', [])
+                    }
+                    data.setdefault('campaign_id', campaign_id)
+                    insights_data.append(data)
                 
-                # Criar entrada de dados
-                data = insight.export_data()
-                data['actions_data'] = actions
-                insights_data.append(data)
+                # A URL da próxima página já inclui todos os parâmetros
+                url = payload.get('paging', {}).get('next')
+                request_params = None
             
             return insights_data
         except Exception as e:
-            logger.error(f"Erro ao obter insights: {str(e)}")
+            logger.error(f"Erro ao obter insights da campanha {campaign_id}: {self._redact(str(e))}")
             return self._simulate_campaign_insights(campaign_id)
     
-    def create_campaign(self, name, objective, budget, status="PAUSED"):
+    def _redact(self, message):
+        """
+        Remove o token de acesso de uma mensagem antes de registrá-la
+        As URLs de paginação retornadas pela API podem incluir o token
+        """
+        if self.access_token:
+            message = message.replace(self.access_token, '***')
+        return message
+    
+    @staticmethod
+    def _rate_limit_delay(headers):
+        """
+        Calcula quanto tempo aguardar com base no cabeçalho x-business-use-case-usage
+        """
+        usage_header = headers.get('x-business-use-case-usage')
+        if not usage_header:
+            return 0
+        
+        try:
+            usage = json.loads(usage_header)
+        except ValueError:
+            return 0
+        
+        delay = 0
+        for entries in usage.values():
+            for entry in entries:
+                # Tempo informado pela API para recuperar o acesso (em minutos)
+                regain_minutes = entry.get('estimated_time_to_regain_access', 0)
+                if regain_minutes:
+                    delay = max(delay, regain_minutes * 60)
+                    continue
+                
+                # Maior percentual de uso entre chamadas, CPU e tempo total
+                used = max(entry.get('call_count', 0), entry.get('total_cputime', 0), entry.get('total_time', 0))
+                if used >= RATE_LIMIT_THRESHOLD:
+                    delay = max(delay, 1 + (used - RATE_LIMIT_THRESHOLD))
+        
+        return delay
+    
+    def create_campaign(self, name, objective, budget=None, status="PAUSED", *, budget_cents=None):
         """
         Cria uma nova campanha
+        O orçamento diário deve ser informado em centavos (budget_cents)
         """
+        budget_cents = _to_cents(budget, budget_cents)
+        
         if not self.api_initialized:
             logger.warning("API do Facebook não inicializada. Usando simulação.")
-            return self._simulate_create_campaign(name, objective, budget, status)
+            return self._simulate_create_campaign(name, objective, budget_cents, status)
         
         try:
             # Definir parâmetros da campanha
@@ -172,12 +803,14 @@ class FacebookAdsAPI:
             }
             
             # Definir orçamento
-            if budget > 0:
-                params['daily_budget'] = int(budget * 100)  # Converter para centavos
+            if budget_cents > 0:
+                params['daily_budget'] = budget_cents
             
             # Criar campanha
             campaign = self.account.create_campaign(params=params)
             logger.info(f"Campanha criada com sucesso: {campaign['id']}")
+            self.invalidate('get_campaigns')
+            _campaign_obj.cache_clear()
             
             # Obter dados completos da campanha
             campaign_data = campaign.api_get(fields=[
@@ -187,28 +820,33 @@ class FacebookAdsAPI:
             return campaign_data
         except Exception as e:
             logger.error(f"Erro ao criar campanha: {str(e)}")
-            return self._simulate_create_campaign(name, objective, budget, status)
+            return self._simulate_create_campaign(name, objective, budget_cents, status)
     
-    def update_campaign_budget(self, campaign_id, budget):
+    def update_campaign_budget(self, campaign_id, budget=None, *, budget_cents=None):
         """
         Atualiza o orçamento de uma campanha existente
+        O orçamento diário deve ser informado em centavos (budget_cents)
         """
+        if budget is None and budget_cents is None:
+            raise TypeError("update_campaign_budget() requer o orçamento (budget_cents)")
+        
+        budget_in_cents = _to_cents(budget, budget_cents)
+        budget = budget_in_cents / 100
+        
         if not self.api_initialized:
             logger.warning("API do Facebook não inicializada. Usando simulação.")
             return self._simulate_update_campaign(campaign_id, {'budget': budget})
         
         try:
-            # Converter orçamento para centavos
-            budget_in_cents = int(budget * 100)
-            
             # Atualizar campanha
-            campaign = Campaign(campaign_id)
+            campaign = _campaign_obj(campaign_id)
             result = campaign.api_update(
                 params={'daily_budget': budget_in_cents}
             )
             
             if result:
                 logger.info(f"Orçamento da campanha {campaign_id} atualizado para R${budget:.2f}")
+                self.invalidate('get_campaigns')
                 return {
                     'success': True,
                     'campaign_id': campaign_id,
@@ -231,23 +869,8 @@ class FacebookAdsAPI:
         """
         logger.info("Gerando dados simulados para contas de anúncios")
         
-        # Definir dados simulados
-        accounts = [
-            {
-                'id': 'act_12345678',
-                'name': 'Lion Dedetizadora - Principal',
-                'account_status': 1,  # 1 = ativo
-                'amount_spent': 1250.75
-            },
-            {
-                'id': 'act_23456789',
-                'name': 'Lion Dedetizadora - Testes',
-                'account_status': 1,
-                'amount_spent': 350.50
-            }
-        ]
-        
-        return accounts
+        # Cópias para que alterações do chamador não afetem os dados base
+        return [dict(account) for account in _SIM_ACCOUNTS]
     
     def _simulate_campaigns(self):
         """
@@ -255,43 +878,31 @@ class FacebookAdsAPI:
         """
         logger.info("Gerando dados simulados para campanhas")
         
-        # Definir dados simulados
-        campaigns = [
-            {
-                'id': '1001001001001',
-                'name': 'Dedetização Residencial - Conversões',
-                'objective': 'CONVERSIONS',
-                'status': 'ACTIVE',
-                'daily_budget': 1000,  # Em centavos
-                'created_time': (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-            },
-            {
-                'id': '1001001001002',
-                'name': 'Dedetização Comercial - Tráfego',
-                'objective': 'TRAFFIC',
-                'status': 'ACTIVE',
-                'daily_budget': 1500,
-                'created_time': (datetime.now() - timedelta(days=15)).strftime('%Y-%m-%d')
-            },
-            {
-                'id': '1001001001003',
-                'name': 'Descupinização - Reconhecimento',
-                'objective': 'AWARENESS',
-                'status': 'PAUSED',
-                'daily_budget': 800,
-                'created_time': (datetime.now() - timedelta(days=45)).strftime('%Y-%m-%d')
-            }
-        ]
-        
-        return campaigns
+        # Cópias para que alterações do chamador não afetem os dados base
+        return [dict(campaign) for campaign in _SIM_CAMPAIGNS]
     
     def _simulate_campaign_insights(self, campaign_id=None):
         """
         Gera dados simulados para insights de campanha
         """
-        # Definir período de 30 dias
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=30)
+        insights = list(iter_insight_dicts(self._simulate_campaign_insights_columnar(campaign_id)))
+        
+        logger.info(f"Gerados {len(insights)} insights simulados")
+        return insights
+    
+    def _simulate_campaign_insights_columnar(self, campaign_id=None):
+        """
+        Gera dados simulados para insights de campanha em formato de colunas
+        """
+        # Definir período de 30 dias (ambas as datas incluídas)
+        end_date = np.datetime64(datetime.now().date(), 'D')
+        dates = np.arange(end_date - 30, end_date + 1)
+        n_days = dates.size
+        
+        # Fatores que afetam o desempenho, iguais para todas as campanhas
+        day_of_week = (dates.astype(np.int64) + 3) % 7  # 1970-01-01 foi uma quinta-feira
+        day_factor = np.where(day_of_week >= 5, 0.8, 1.0)  # Fim de semana tem menos tráfego
+        trend_factor = 1.0 + np.arange(n_days) * 0.01  # Tendência crescente ao longo do tempo
         
         # Definir dados base para cada campanha
         campaign_base_data = {
@@ -321,86 +932,59 @@ class FacebookAdsAPI:
             }
         }
         
-        # Gerar insights
-        insights = []
-        
         # Se um ID for especificado, gerar apenas para essa campanha
         campaign_ids = [campaign_id] if campaign_id else list(campaign_base_data.keys())
         
-        for camp_id in campaign_ids:
-            # Se o ID não estiver nos dados base, usar o primeiro
-            if camp_id not in campaign_base_data:
-                camp_id = list(campaign_base_data.keys())[0]
-            
-            base_data = campaign_base_data[camp_id]
-            
-            # Gerar dados para cada dia
-            current_date = start_date
-            while current_date <= end_date:
-                # Fatores que afetam o desempenho
-                day_of_week = current_date.weekday()
-                day_factor = 0.8 if day_of_week >= 5 else 1.0  # Fim de semana tem menos tráfego
-                
-                # Tendência crescente ao longo do tempo
-                days_passed = (current_date - start_date).days
-                trend_factor = 1.0 + (days_passed * 0.01)
-                
-                # Ruído aleatório para variação natural
-                noise = random.uniform(0.85, 1.15)
-                
-                # Calcular métricas do dia
-                impressions = int(base_data['base_impressions'] * day_factor * trend_factor * noise)
-                ctr = base_data['base_ctr'] * day_factor * noise
-                clicks = int((ctr / 100) * impressions)
-                cpc = base_data['base_cpc'] * noise
-                spend = round(clicks * cpc, 2)
-                
-                # Limite de gasto diário
-                spend = min(spend, base_data['base_budget'])
-                
-                # Conversões e ações
-                conv_rate = base_data['base_conv_rate'] * noise
-                conversions = int((conv_rate / 100) * clicks)
-                
-                # Criar objeto de insights
-                insight = {
-                    'date_start': current_date.strftime('%Y-%m-%d'),
-                    'date_stop': current_date.strftime('%Y-%m-%d'),
-                    'campaign_id': camp_id,
-                    'campaign_name': base_data['name'],
-                    'impressions': impressions,
-                    'clicks': clicks,
-                    'ctr': ctr,
-                    'cpc': cpc,
-                    'spend': spend,
-                    'reach': int(impressions * 0.8),  # 80% das impressões são pessoas únicas
-                    'frequency': 1.25,  # Média de 1.25 impressões por pessoa
-                    'actions_data': {
-                        'lead': conversions,
-                        'page_engagement': int(clicks * 1.5),
-                        'landing_page_view': int(clicks * 0.9)
-                    }
-                }
-                
-                insights.append(insight)
-                current_date += timedelta(days=1)
+        # Se o ID não estiver nos dados base, usar o primeiro
+        campaign_ids = [camp_id if camp_id in campaign_base_data else next(iter(campaign_base_data))
+                        for camp_id in campaign_ids]
+        base_data = [campaign_base_data[camp_id] for camp_id in campaign_ids]
         
-        logger.info(f"Gerados {len(insights)} insights simulados")
-        return insights
+        # Dados base de cada campanha em uma matriz (n_campanhas, 5)
+        bases = np.array([
+            (data['base_impressions'], data['base_ctr'], data['base_cpc'],
+             data['base_conv_rate'], data['base_budget'])
+            for data in base_data
+        ], dtype=np.float64)
+        
+        # Ruído aleatório para variação natural, sorteado para todas as campanhas e dias de uma vez
+        noise = _NP_RNG.uniform(0.85, 1.15, (len(campaign_ids), n_days))
+        
+        # Calcular métricas de todas as campanhas e dias
+        impressions, clicks, ctr, cpc, spend, conversions = _simulate_daily_metrics(
+            bases, day_factor, trend_factor, noise
+        )
+        
+        columns = InsightsColumns(
+            date_start=np.tile(dates, len(campaign_ids)),
+            campaign_id=np.repeat(np.array(campaign_ids, dtype=object), n_days),
+            campaign_name=np.repeat(np.array([data['name'] for data in base_data], dtype=object), n_days),
+            impressions=impressions,
+            clicks=clicks,
+            ctr=ctr,
+            cpc=cpc,
+            spend=spend,
+            reach=(impressions * 0.8).astype(np.int64),  # 80% das impressões são pessoas únicas
+            conversions=conversions,
+            page_engagement=(clicks * 1.5).astype(np.int64),
+            landing_page_view=(clicks * 0.9).astype(np.int64)
+        )
+        
+        return columns
     
-    def _simulate_create_campaign(self, name, objective, budget, status):
+    def _simulate_create_campaign(self, name, objective, budget_cents, status):
         """
         Simula a criação de uma campanha
         """
         # Gerar ID aleatório
-        campaign_id = ''.join(random.choices('0123456789', k=13))
+        campaign_id = str(_PY_RNG.randrange(10**12, 10**13))
         
         campaign = {
             'id': campaign_id,
             'name': name,
             'objective': objective,
             'status': status,
-            'daily_budget': int(budget * 100),  # Converter para centavos
+            'daily_budget': budget_cents,  # Em centavos
             'created_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             'simulated': True
         }
@@ -436,56 +1020,48 @@ class FacebookAdsAPI:
         Obtém e processa dados de desempenho de campanhas para análise
         Retorna um DataFrame pronto para uso com machine learning
         """
-        # Obter insights das campanhas
-        insights = self.get_campaign_insights(date_preset=f"last_{days}_days")
+        # Importado aqui para não pesar na importação do módulo
+        import pandas as pd
+        
+        # Obter insights das campanhas em formato de colunas
+        columns = self.get_campaign_insights_columns(date_preset=f"last_{days}_days")
         
         # Se não houver dados, retornar DataFrame vazio
-        if not insights:
+        if not columns['date_start'].size:
             logger.warning("Não foram encontrados dados de desempenho")
             return pd.DataFrame()
         
-        # Processar dados
-        data = []
+        # Ordenar por data apenas se necessário (verificação O(N) antes da ordenação)
+        index = None
+        if np.any(np.diff(columns['date_start'].view(np.int64)) < 0):
+            index = np.argsort(columns['date_start'], kind='stable')
+            columns = {field: values[index] for field, values in columns.items()}
         
-        for insight in insights:
-            # Extrair data
-            date = datetime.strptime(insight['date_start'], '%Y-%m-%d')
-            
-            # Extrair ações (conversões)
-            conversions = 0
-            if 'actions_data' in insight and 'lead' in insight['actions_data']:
-                conversions = int(insight['actions_data']['lead'])
-            
-            # Criar entrada
-            entry = {
-                'date': date,
-                'campaign_id': insight['campaign_id'],
-                'campaign_name': insight['campaign_name'],
-                'impressions': insight['impressions'],
-                'clicks': insight['clicks'],
-                'spend': insight['spend'],
-                'ctr': insight['ctr'],
-                'cpc': insight['cpc'],
-                'conversions': conversions,
-                'day_of_week': date.weekday(),
-                'month': date.month
-            }
-            
-            # Calcular métricas derivadas
-            if conversions > 0:
-                entry['cpa'] = entry['spend'] / conversions
-                entry['conversion_rate'] = (conversions / entry['clicks']) * 100 if entry['clicks'] > 0 else 0
-            else:
-                entry['cpa'] = 0
-                entry['conversion_rate'] = 0
-            
-            data.append(entry)
+        dates = columns['date_start']
+        clicks = columns['clicks']
+        spend = columns['spend']
+        conversions = columns['conversions']
         
-        # Criar DataFrame
-        df = pd.DataFrame(data)
+        # Calcular métricas derivadas
+        cpa = np.where(conversions > 0, spend / np.maximum(conversions, 1), 0.0)
+        conversion_rate = np.where(clicks > 0, conversions / np.maximum(clicks, 1) * 100, 0.0)
         
-        # Ordenar por data
-        df = df.sort_values('date')
+        # Criar DataFrame a partir de colunas já tipadas, na ordem de _PERF_FIELDS
+        df = pd.DataFrame(dict(zip(_PERF_FIELDS, (
+            dates,
+            columns['campaign_id'],
+            columns['campaign_name'],
+            columns['impressions'],
+            clicks,
+            spend,
+            columns['ctr'],
+            columns['cpc'],
+            conversions,
+            (dates.astype(np.int64) + 3) % 7,  # 1970-01-01 foi uma quinta-feira
+            dates.astype('datetime64[M]').astype(np.int64) % 12 + 1,
+            cpa,
+            conversion_rate
+        ))), index=index, copy=False)
         
         logger.info(f"Processados {len(df)} registros de desempenho de campanhas")
         return df
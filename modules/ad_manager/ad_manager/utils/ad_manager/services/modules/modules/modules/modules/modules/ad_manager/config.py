@@ -1,5 +1,6 @@
 import os
 import logging
+import functools
 from dotenv import load_dotenv
 
 # Carregar variáveis de ambiente
@@ -12,6 +13,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Variáveis de ambiente verificadas por validate_config
+_CONFIG_KEYS = (
+    'FB_ACCESS_TOKEN', 'FB_ACCOUNT_ID',
+    'EMAIL_USERNAME', 'EMAIL_PASSWORD', 'EMAIL_RECIPIENT',
+    'OPENAI_API_KEY'
+)
+
+@functools.lru_cache(maxsize=1)
+def _read_config_flags():
+    """
+    Lê uma única vez quais variáveis de ambiente de configuração estão definidas.
+    As variáveis não mudam durante a execução (a página de configuração grava apenas o .env).
+    
+    Returns:
+        tuple: Um booleano para cada chave de _CONFIG_KEYS
+    """
+    return tuple(bool(os.environ.get(key)) for key in _CONFIG_KEYS)
+
 def validate_config():
     """
     Verifica quais configurações estão disponíveis e retorna um relatório de status.
@@ -20,41 +39,36 @@ def validate_config():
     Returns:
         tuple: (status geral, dict com status específicos)
     """
+    (fb_token, fb_account,
+     email_username, email_password, email_recipient,
+     openai_key) = _read_config_flags()
+    
     status = {}
     
     # Verificar configurações do Facebook
-    fb_token = os.environ.get('FB_ACCESS_TOKEN')
-    fb_account = os.environ.get('FB_ACCOUNT_ID')
-    
     status['facebook_api'] = {
-        'configured': bool(fb_token and fb_account),
+        'configured': fb_token and fb_account,
         'details': {
-            'access_token': bool(fb_token),
-            'account_id': bool(fb_account)
+            'access_token': fb_token,
+            'account_id': fb_account
         }
     }
     
     # Verificar configurações de e-mail
-    email_username = os.environ.get('EMAIL_USERNAME')
-    email_password = os.environ.get('EMAIL_PASSWORD')
-    email_recipient = os.environ.get('EMAIL_RECIPIENT')
-    
     status['email'] = {
-        'configured': bool(email_username and email_password and email_recipient),
+        'configured': email_username and email_password and email_recipient,
         'details': {
-            'username': bool(email_username),
-            'password': bool(email_password),
-            'recipient': bool(email_recipient)
+            'username': email_username,
+            'password': email_password,
+            'recipient': email_recipient
         }
     }
     
     # Verificar configurações da OpenAI
-    openai_key = os.environ.get('OPENAI_API_KEY')
-    
     status['openai_api'] = {
-        'configured': bool(openai_key),
+        'configured': openai_key,
         'details': {
-            'api_key': bool(openai_key)
+            'api_key': openai_key
         }
     }
     
@@ -66,3 +80,6 @@ def validate_config():
     ])
     
     return overall_status, status
+
+# Permite reler as variáveis de ambiente (por exemplo, em testes)
+validate_config.cache_clear = _read_config_flags.cache_clear
@@ -2,17 +2,438 @@ import os
 import logging
 import json
 import datetime
-import numpy as np
+import functools
+import math
+import time
+import queue
+import atexit
+import threading
+import sqlite3
+import pathlib
+from contextlib import closing
+from bisect import bisect_right
+from dataclasses import dataclass
 from typing import Dict, List, Union, Optional
 
+# Tentar importar o orjson para serializar as recomendações se estiver disponível
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Configurar logging
 logger = logging.getLogger(__name__)
 
-class CampaignOptimizer:
+# Gravação das recomendações em lote: até FLUSH_BATCH_SIZE itens ou a cada FLUSH_INTERVAL segundos
+FLUSH_BATCH_SIZE = 100
+FLUSH_INTERVAL = 0.5
+
+# Banco SQLite das recomendações; guarda apenas as RECS_MAX_ROWS mais recentes
+RECS_DB_NAME = 'recs.db'
+RECS_MAX_ROWS = 100000
+
+# Pesos da pontuação de desempenho dos anúncios: ROI, CTR e taxa de conversão
+SCORE_WEIGHTS = (0.5, 0.3, 0.2)
+
+@functools.cache
+def _lazy_np():
+    """
+    Importa o NumPy apenas quando um caminho vetorizado é usado
+    """
+    import numpy
+    return numpy
+
+def _dump_json(record):
+    """
+    Serializa um registro como JSON (bytes UTF-8)
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(record, default=str, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(record, ensure_ascii=False, default=str).encode('utf-8')
+
+def _vectorize(ads):
+    """
+    Extrai as métricas dos anúncios para arrays NumPy
+    
+    Args:
+        ads (list): Lista de dicionários com dados de desempenho de anúncios
+        
+    Returns:
+        tuple: Arrays (roi, ctr, conversion_rate, budget)
+    """
+    np = _lazy_np()
+    count = len(ads)
+    return tuple(
+        np.fromiter((ad.get(key, 0) for ad in ads), dtype=np.float64, count=count)
+        for key in ('roi', 'ctr', 'conversion_rate', 'budget')
+    )
+
+# Faixas de ROI (%) e o ajuste de orçamento de cada uma
+# Os limites inferiores (50 e 100) pertencem à faixa de baixo, por isso o nextafter
+ROI_EDGES = (math.nextafter(50, math.inf), math.nextafter(100, math.inf), 200, 300, 500)
+ROI_FACTORS = (0.7, 0.85, 1.0, 1.1, 1.2, 1.3)
+ROI_MSGS = (
+    "ROI muito baixo, reduzindo orçamento em 30%",
+    "ROI baixo, reduzindo orçamento em 15%",
+    "ROI médio, mantendo orçamento base",
+    "ROI bom, aumentando orçamento em 10%",
+    "ROI muito bom, aumentando orçamento em 20%",
+    "ROI excelente, aumentando orçamento em 30%"
+)
+
+# Faixas de CTR (%) e o ajuste adicional de cada uma
+CTR_EDGES = (math.nextafter(0.5, math.inf), math.nextafter(1.0, math.inf), 2.0, 3.0)
+CTR_FACTORS = (0.9, 0.95, 1.0, 1.05, 1.1)
+CTR_MSGS = (
+    "CTR muito baixo, reduzindo orçamento em 10% adicional",
+    "CTR baixo, reduzindo orçamento em 5% adicional",
+    "CTR médio, sem ajuste adicional",
+    "CTR muito bom, aumentando orçamento em 5% adicional",
+    "CTR excelente, aumentando orçamento em 10% adicional"
+)
+
+# Valores dentro da faixa neutra de ROI e CTR: abaixo deles a quantização arredonda para cima
+# (limites "<=") e acima deles para baixo (limites ">="), preservando as faixas exatas
+ROI_PIVOT = 150
+CTR_PIVOT = 1.5
+
+# Faixas neutras (ROI médio e CTR médio), usadas também para valores NaN
+ROI_NEUTRAL = 2
+CTR_NEUTRAL = 2
+
+@functools.lru_cache(maxsize=4096)
+def _compute_factor(roi_q, ctr_q):
+    """
+    Busca nas tabelas de faixas o fator de desempenho para ROI e CTR quantizados
+    Após alterar as tabelas em tempo de execução, chame _compute_factor.cache_clear()
+    
+    Args:
+        roi_q (int): ROI em décimos de ponto percentual
+        ctr_q (int): CTR em centésimos de ponto percentual
+        
+    Returns:
+        tuple: (fator de desempenho, índice da faixa de ROI, índice da faixa de CTR)
+    """
+    roi_index = bisect_right(ROI_EDGES, roi_q / 10)
+    ctr_index = bisect_right(CTR_EDGES, ctr_q / 100)
+    return ROI_FACTORS[roi_index] * CTR_FACTORS[ctr_index], roi_index, ctr_index
+
+def _assess_performance(roi, ctr):
+    """
+    Obtém o fator de desempenho e as avaliações de ROI e CTR
+    ROI e CTR são quantizados (0,1% e 0,01%) para reaproveitar o cache de _compute_factor,
+    no sentido que mantém cada valor na mesma faixa
+    
+    Args:
+        roi (float): ROI em percentual
+        ctr (float): CTR em percentual
+        
+    Returns:
+        tuple: (fator de desempenho, mensagem do ROI, mensagem do CTR)
+    """
+    roi_scaled = roi * 10
+    ctr_scaled = ctr * 100
+    if math.isfinite(roi_scaled) and math.isfinite(ctr_scaled):
+        roi_q = math.ceil(roi_scaled) if roi < ROI_PIVOT else math.floor(roi_scaled)
+        ctr_q = math.ceil(ctr_scaled) if ctr < CTR_PIVOT else math.floor(ctr_scaled)
+        performance_factor, roi_index, ctr_index = _compute_factor(roi_q, ctr_q)
+    else:
+        # Valores infinitos (ou que transbordam ao escalar) não podem ser quantizados;
+        # NaN não satisfaz nenhum limite e fica na faixa neutra
+        roi_index = ROI_NEUTRAL if math.isnan(roi) else bisect_right(ROI_EDGES, roi)
+        ctr_index = CTR_NEUTRAL if math.isnan(ctr) else bisect_right(CTR_EDGES, ctr)
+        performance_factor = ROI_FACTORS[roi_index] * CTR_FACTORS[ctr_index]
+    
+    return performance_factor, ROI_MSGS[roi_index], CTR_MSGS[ctr_index]
+
+def _compute_new_budget(performance_factor, budget):
+    """
+    Aplica o fator de desempenho ao orçamento, limitando a variação
+    
+    Args:
+        performance_factor (float): Fator de desempenho
+        budget (float): Orçamento atual
+        
+    Returns:
+        float: Novo orçamento sem arredondamento
+    """
+    # Limitar o fator entre 0.5 (orçamento não cai demais) e 2.0 (evita gastos excessivos repentinos)
+    return budget * min(2.0, max(0.5, performance_factor))
+
+def _compute_bid(cpc, conversion_rate, target_cpa):
+    """
+    Calcula o novo lance para atingir o CPA alvo
+    
+    Args:
+        cpc (float): CPC atual
+        conversion_rate (float): Taxa de conversão em decimal
+        target_cpa (float): CPA alvo
+        
+    Returns:
+        tuple: (novo lance, fator de ajuste do lance)
+    """
+    # Calcular lance ideal baseado no CPA alvo e taxa de conversão
+    ideal_bid = target_cpa * conversion_rate
+    
+    # Ajustar gradualmente para evitar mudanças bruscas
+    bid_adjustment = (ideal_bid / cpc) if cpc > 0 else 1.0
+    
+    # Limitar ajustes para evitar mudanças extremas
+    bid_adjustment = min(max(bid_adjustment, 0.7), 1.3)
+    
+    # Calcular novo lance, arredondado para 2 casas decimais
+    new_bid = round(cpc * bid_adjustment, 2)
+    
+    return new_bid, bid_adjustment
+
+@dataclass(slots=True)
+class AdPerf:
+    """
+    Dados de desempenho de um anúncio usados na realocação de orçamento
+    """
+    id: Optional[str] = None
+    roi: float = 0.0
+    ctr: float = 0.0
+    conversion_rate: float = 0.0
+    budget: float = 0.0
+    
+    @classmethod
+    def from_dicts(cls, dicts):
+        """
+        Converte dicionários de desempenho de anúncios em objetos AdPerf
+        
+        Args:
+            dicts (list): Lista de dicionários com dados de desempenho de anúncios
+            
+        Returns:
+            list: Lista de AdPerf
+        """
+        return [
+            cls(ad.get('id'), ad.get('roi', 0), ad.get('ctr', 0),
+                ad.get('conversion_rate', 0), ad.get('budget', 0))
+            for ad in dicts
+        ]
+    
+    @staticmethod
+    def to_arrays(ads):
+        """
+        Extrai as métricas dos anúncios para arrays NumPy contíguos
+        
+        Args:
+            ads (list): Lista de AdPerf
+            
+        Returns:
+            tuple: Arrays (roi, ctr, conversion_rate, budget)
+        """
+        np = _lazy_np()
+        count = len(ads)
+        return (
+            np.fromiter((ad.roi for ad in ads), dtype=np.float64, count=count),
+            np.fromiter((ad.ctr for ad in ads), dtype=np.float64, count=count),
+            np.fromiter((ad.conversion_rate for ad in ads), dtype=np.float64, count=count),
+            np.fromiter((ad.budget for ad in ads), dtype=np.float64, count=count)
+        )
+
+@dataclass(slots=True)
+class Recommendation:
+    """
+    Recomendação de orçamento gerada por adjust_budget
+    """
+    campaign_id: Optional[str]
+    timestamp: str
+    roi: float
+    ctr: float
+    previous_budget: float
+    new_budget: float
+    change_percent: float
+    roi_message: str
+    ctr_message: str
+    
+    def to_dict(self):
+        """
+        Converte a recomendação para o formato de dicionário usado na gravação
+        """
+        return {
+            "campaign_id": self.campaign_id,
+            "timestamp": self.timestamp,
+            "performance": {
+                "roi": self.roi,
+                "ctr": self.ctr
+            },
+            "budget": {
+                "previous": self.previous_budget,
+                "recommended": self.new_budget,
+                "change_percent": self.change_percent
+            },
+            "messages": {
+                "roi_assessment": self.roi_message,
+                "ctr_assessment": self.ctr_message
+            }
+        }
+
+class _RecommendationWriter:
+    """
+    Thread única, compartilhada por todos os otimizadores, que grava em lote
+    as recomendações enfileiradas nos bancos SQLite
+    """
     def __init__(self):
+        self._queue = queue.Queue()
+        # Protege o início e o encerramento da thread; close() o mantém até a thread terminar
+        self._lock = threading.Lock()
+        self._thread = None
+    
+    def put(self, db_path, error_path, row):
+        """
+        Enfileira uma recomendação, iniciando a thread de gravação se necessário
+        
+        Args:
+            db_path (Path): Banco de destino
+            error_path (Path): Arquivo onde registrar erros de gravação
+            row (tuple): (data e hora, campaign_id, recomendação serializada)
+        """
+        # Enfileirar com o lock: nenhuma recomendação fica depois do sinal de encerramento
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="recommendation-writer", daemon=True)
+                self._thread.start()
+            self._queue.put((db_path, error_path, row))
+    
+    def flush(self):
+        """
+        Aguarda a gravação de todas as recomendações enfileiradas
+        """
+        self._queue.join()
+    
+    def close(self):
+        """
+        Grava as recomendações pendentes, encerra a thread e fecha as conexões
+        A thread é iniciada novamente na próxima recomendação enfileirada
+        """
+        # put() aguarda o fim do encerramento, para não iniciar uma segunda thread
+        # enquanto esta ainda grava as recomendações pendentes
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None or not thread.is_alive():
+                return
+            self._queue.put(None)
+            thread.join()
+    
+    def _loop(self):
+        """
+        Consome a fila de recomendações, gravando até FLUSH_BATCH_SIZE itens
+        ou o que tiver chegado em FLUSH_INTERVAL segundos
+        """
+        # Conexões abertas, por banco; pertencem a esta thread
+        conns = {}
+        
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            
+            while batch[-1] is not None and len(batch) < FLUSH_BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            
+            stop = batch[-1] is None
+            try:
+                items = batch[:-1] if stop else batch
+                # Agrupar por banco, mantendo a ordem de chegada
+                by_db = {}
+                for db_path, error_path, row in items:
+                    by_db.setdefault((db_path, error_path), []).append(row)
+                for (db_path, error_path), rows in by_db.items():
+                    self._write_batch(conns, db_path, error_path, rows)
+                if stop:
+                    for conn in conns.values():
+                        conn.close()
+            finally:
+                # Sempre liberar os itens, para que flush() e o atexit nunca fiquem bloqueados
+                for _ in batch:
+                    self._queue.task_done()
+            
+            if stop:
+                return
+    
+    def _connect(self, db_path):
+        """
+        Abre o banco de recomendações em modo WAL, criando a tabela se necessário
+        """
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS recs ("
+            "id INTEGER PRIMARY KEY, ts TEXT, campaign_id TEXT, payload BLOB)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS recs_campaign ON recs (campaign_id)")
+        return conn
+    
+    def _write_batch(self, conns, db_path, error_path, rows):
+        """
+        Grava um lote de recomendações já serializadas no banco em uma única transação
+        """
+        try:
+            conn = conns.get(db_path)
+            if conn is None:
+                conn = conns[db_path] = self._connect(db_path)
+            
+            with conn:
+                conn.execute("BEGIN")
+                conn.executemany("INSERT INTO recs (ts, campaign_id, payload) VALUES (?, ?, ?)", rows)
+                # Descartar as recomendações mais antigas além do limite
+                conn.execute("DELETE FROM recs WHERE id <= (SELECT MAX(id) FROM recs) - ?", (RECS_MAX_ROWS,))
+            
+            logger.info(f"{len(rows)} recomendações salvas em: {db_path}")
+        except Exception as e:
+            _log_save_error(error_path, e)
+
+def _log_save_error(error_path, error):
+    """
+    Registra uma falha ao salvar recomendações no log e no arquivo de erros
+    """
+    logger.error(f"Erro ao salvar recomendações: {str(error)}")
+    try:
+        with open(error_path, 'a', encoding='utf-8') as f:
+            f.write(f"{datetime.datetime.now()}: Erro ao salvar recomendações: {str(error)}\n")
+    except OSError as log_error:
+        logger.error(f"Erro ao registrar falha em {error_path}: {str(log_error)}")
+
+# Gravador compartilhado; as recomendações pendentes são gravadas ao encerrar o programa
+_WRITER = _RecommendationWriter()
+atexit.register(_WRITER.close)
+
+def shutdown():
+    """
+    Grava as recomendações pendentes e encerra a thread de gravação
+    Deve ser chamada antes de encerrar o processo sem passar pelo atexit (por exemplo, com os._exit)
+    """
+    _WRITER.close()
+
+class CampaignOptimizer:
+    def __init__(self, eager=False, verbose=False):
+        """
+        Args:
+            eager (bool): Se True, grava cada recomendação imediatamente em um arquivo
+                          próprio (formato antigo), sem a fila de gravação em lote
+            verbose (bool): Se True, grava também o resumo legível em texto de cada recomendação
+        """
+        # Diretórios usados nas gravações, resolvidos uma única vez
+        self._cwd = pathlib.Path(os.getcwd())
+        self._rec_path = self._cwd / 'recommendations'
+        
         # Criar diretório para recomendações se não existir
-        if not os.path.exists('recommendations'):
-            os.makedirs('recommendations')
+        self._rec_path.mkdir(exist_ok=True)
+        
+        self.eager = eager
+        self.verbose = verbose
+        self._db_path = self._rec_path / RECS_DB_NAME
+        
     
     def adjust_budget(self, roi, ctr, budget, campaign_id=None):
         """
@@ -28,92 +449,28 @@ class CampaignOptimizer:
             float: Novo orçamento recomendado
         """
         try:
-            # Definir fatores de ajuste
-            performance_factor = 1.0  # Fator base (sem alteração)
-            
-            # Ajustar com base no ROI
-            if roi >= 500:
-                # ROI excelente (> 500%)
-                performance_factor *= 1.3  # Aumentar em 30%
-                roi_message = "ROI excelente, aumentando orçamento em 30%"
-            elif roi >= 300:
-                # ROI muito bom (300-500%)
-                performance_factor *= 1.2  # Aumentar em 20%
-                roi_message = "ROI muito bom, aumentando orçamento em 20%"
-            elif roi >= 200:
-                # ROI bom (200-300%)
-                performance_factor *= 1.1  # Aumentar em 10%
-                roi_message = "ROI bom, aumentando orçamento em 10%"
-            elif roi <= 50:
-                # ROI muito baixo (< 50%)
-                performance_factor *= 0.7  # Reduzir em 30%
-                roi_message = "ROI muito baixo, reduzindo orçamento em 30%"
-            elif roi <= 100:
-                # ROI baixo (50-100%)
-                performance_factor *= 0.85  # Reduzir em 15%
-                roi_message = "ROI baixo, reduzindo orçamento em 15%"
-            else:
-                # ROI médio (100-200%)
-                roi_message = "ROI médio, mantendo orçamento base"
-            
-            # Ajustar com base no CTR
-            if ctr >= 3.0:
-                # CTR excelente (> 3%)
-                performance_factor *= 1.1  # Aumentar em mais 10%
-                ctr_message = "CTR excelente, aumentando orçamento em 10% adicional"
-            elif ctr >= 2.0:
-                # CTR muito bom (2-3%)
-                performance_factor *= 1.05  # Aumentar em mais 5%
-                ctr_message = "CTR muito bom, aumentando orçamento em 5% adicional"
-            elif ctr <= 0.5:
-                # CTR muito baixo (< 0.5%)
-                performance_factor *= 0.9  # Reduzir em mais 10%
-                ctr_message = "CTR muito baixo, reduzindo orçamento em 10% adicional"
-            elif ctr <= 1.0:
-                # CTR baixo (0.5-1%)
-                performance_factor *= 0.95  # Reduzir em mais 5%
-                ctr_message = "CTR baixo, reduzindo orçamento em 5% adicional"
-            else:
-                # CTR médio (1-2%)
-                ctr_message = "CTR médio, sem ajuste adicional"
-            
             # Calcular novo orçamento
-            new_budget = budget * performance_factor
-            
-            # Garantir que o novo orçamento não seja muito baixo
-            new_budget = max(new_budget, budget * 0.5)
-            
-            # Limitar aumento máximo para evitar gastos excessivos repentinos
-            new_budget = min(new_budget, budget * 2.0)
+            performance_factor, roi_message, ctr_message = _assess_performance(roi, ctr)
+            new_budget = _compute_new_budget(performance_factor, float(budget))
             
             # Arredondar para 2 casas decimais
             new_budget = round(new_budget, 2)
             
+            # Variação percentual (orçamento zero não tem variação)
+            change_pct = 0.0 if budget == 0 else (new_budget / budget - 1.0) * 100.0
+            
             # Registrar a recomendação
-            logger.info(f"Ajustando orçamento da campanha {campaign_id}:")
-            logger.info(f"ROI: {roi:.2f}% - {roi_message}")
-            logger.info(f"CTR: {ctr:.2f}% - {ctr_message}")
-            logger.info(f"Orçamento anterior: R${budget:.2f}")
-            logger.info(f"Novo orçamento recomendado: R${new_budget:.2f}")
+            logger.info("Ajustando orçamento da campanha %s:", campaign_id)
+            logger.info("ROI: %.2f%% - %s", roi, roi_message)
+            logger.info("CTR: %.2f%% - %s", ctr, ctr_message)
+            logger.info("Orçamento anterior: R$%.2f", budget)
+            logger.info("Novo orçamento recomendado: R$%.2f (Ajuste: %.1f%%)", new_budget, change_pct)
             
             # Salvar recomendação
-            recommendation = {
-                "campaign_id": campaign_id,
-                "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "performance": {
-                    "roi": roi,
-                    "ctr": ctr
-                },
-                "budget": {
-                    "previous": budget,
-                    "recommended": new_budget,
-                    "change_percent": ((new_budget / budget) - 1) * 100
-                },
-                "messages": {
-                    "roi_assessment": roi_message,
-                    "ctr_assessment": ctr_message
-                }
-            }
+            recommendation = Recommendation(
+                campaign_id, datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                roi, ctr, budget, new_budget, change_pct, roi_message, ctr_message
+            )
             
             self.save_recommendations(recommendation, campaign_id)
             
@@ -123,6 +480,48 @@ class CampaignOptimizer:
             logger.error(f"Erro ao ajustar orçamento: {str(e)}")
             return budget
     
+    def adjust_budgets_batch(self, rois, ctrs, budgets, ids=None):
+        """
+        Ajusta o orçamento de várias campanhas de uma vez, com operações vetorizadas
+        Usa as mesmas faixas de adjust_budget, mas não registra nem salva recomendações
+        
+        Args:
+            rois (array): ROI de cada campanha em percentual
+            ctrs (array): CTR de cada campanha em percentual
+            budgets (array): Orçamento atual de cada campanha
+            ids (list): Identificadores das campanhas
+            
+        Returns:
+            np.ndarray: Array estruturado com os campos id, performance_factor,
+                        previous_budget e budget
+        """
+        np = _lazy_np()
+        rois = np.asarray(rois, dtype=np.float64)
+        ctrs = np.asarray(ctrs, dtype=np.float64)
+        budgets = np.asarray(budgets, dtype=np.float64)
+        
+        # Faixa de cada campanha nas tabelas de ROI e CTR (NaN fica na faixa neutra)
+        roi_bands = np.where(np.isnan(rois), ROI_NEUTRAL, np.digitize(rois, ROI_EDGES))
+        ctr_bands = np.where(np.isnan(ctrs), CTR_NEUTRAL, np.digitize(ctrs, CTR_EDGES))
+        roi_factors = np.asarray(ROI_FACTORS)[roi_bands]
+        ctr_factors = np.asarray(CTR_FACTORS)[ctr_bands]
+        
+        # Limitar o fator entre 0.5 e 2.0 e arredondar para 2 casas decimais
+        factors = roi_factors * ctr_factors
+        new_budgets = np.round(budgets * np.clip(factors, 0.5, 2.0), 2)
+        
+        result = np.empty(budgets.size, dtype=[
+            ('id', object), ('performance_factor', np.float64),
+            ('previous_budget', np.float64), ('budget', np.float64)
+        ])
+        result['id'] = ids if ids is not None else None
+        result['performance_factor'] = factors
+        result['previous_budget'] = budgets
+        result['budget'] = new_budgets
+        
+        logger.info("Orçamento ajustado para %d campanhas", budgets.size)
+        return result
+    
     def reallocate_budget(self, ads_performance):
         """
         Realoca orçamento entre anúncios baseado em desempenho
@@ -133,67 +532,118 @@ class CampaignOptimizer:
         Returns:
             list: Lista atualizada com orçamentos ajustados
         """
+        result = self._reallocate_arrays(ads_performance)
+        if result is None:
+            return ads_performance
+        
+        # Atualizar os anúncios diretamente a partir dos arrays
+        _, budgets, new_budgets, scores, change_percents = result
+        for ad, score, previous_budget, new_budget, change_percent in zip(
+            ads_performance, scores.tolist(), budgets.tolist(),
+            new_budgets.tolist(), change_percents.tolist()
+        ):
+            ad['performance_score'] = score
+            ad['previous_budget'] = previous_budget
+            ad['budget'] = new_budget
+            ad['budget_change_percent'] = change_percent
+        
+        return ads_performance
+    
+    def reallocate_budget_vectorized(self, ads_performance):
+        """
+        Realoca orçamento entre anúncios baseado em desempenho, sem alterar os dados de entrada
+        
+        Args:
+            ads_performance (list): Lista de AdPerf ou de dicionários com dados de desempenho de anúncios
+            
+        Returns:
+            DataFrame: Colunas id, previous_budget, budget, performance_score e
+                       budget_change_percent, na ordem dos anúncios; None se não
+                       for possível realocar
+        """
+        result = self._reallocate_arrays(ads_performance)
+        if result is None:
+            return None
+        
+        ids, budgets, new_budgets, scores, change_percents = result
+        
+        # Importado aqui para não pesar na importação do módulo
+        import pandas as pd
+        
+        return pd.DataFrame({
+            'id': ids,
+            'previous_budget': budgets,
+            'budget': new_budgets,
+            'performance_score': scores,
+            'budget_change_percent': change_percents
+        })
+    
+    def _reallocate_arrays(self, ads_performance):
+        """
+        Calcula a realocação de orçamento com operações vetorizadas
+        
+        Args:
+            ads_performance (list): Lista de AdPerf ou de dicionários com dados de desempenho de anúncios
+            
+        Returns:
+            tuple: (ids, orçamentos anteriores, novos orçamentos, pontuações, variações percentuais),
+                   ou None se não for possível realocar
+        """
         try:
             if not ads_performance or len(ads_performance) < 2:
                 logger.warning("Não há anúncios suficientes para realocação de orçamento")
-                return ads_performance
-            
-            # Calcular pontuação de desempenho para cada anúncio
-            for ad in ads_performance:
-                # Garantir que os dados necessários existem
-                roi = ad.get('roi', 0)
-                ctr = ad.get('ctr', 0)
-                conversion_rate = ad.get('conversion_rate', 0)
-                
-                # Calcular pontuação ponderada (ROI tem maior peso)
-                performance_score = (roi * 0.5) + (ctr * 0.3) + (conversion_rate * 0.2)
-                ad['performance_score'] = performance_score
-            
-            # Calcular pontuação total e média
-            total_score = sum(ad['performance_score'] for ad in ads_performance)
-            average_score = total_score / len(ads_performance)
+                return None
+            
+            np = _lazy_np()
+            
+            if isinstance(ads_performance[0], AdPerf):
+                roi, ctr, conversion_rate, budgets = AdPerf.to_arrays(ads_performance)
+                ids = [ad.id for ad in ads_performance]
+            else:
+                roi, ctr, conversion_rate, budgets = _vectorize(ads_performance)
+                ids = [ad.get('id') for ad in ads_performance]
+            
+            # Calcular pontuação ponderada de cada anúncio (ROI tem maior peso)
+            metrics = np.column_stack((roi, ctr, conversion_rate))
+            scores = metrics @ np.asarray(SCORE_WEIGHTS)
+            total_score = scores.sum()
             
             # Calcular orçamento total atual
-            total_budget = sum(ad.get('budget', 0) for ad in ads_performance)
+            total_budget = budgets.sum()
             
             # Se não houver orçamento total, não há o que realocar
             if total_budget <= 0:
                 logger.warning("Orçamento total zero, não é possível realocar")
-                return ads_performance
-            
-            # Calcular novos orçamentos baseados em desempenho
-            for ad in ads_performance:
-                # Calcular fator de ajuste relativo à média
-                relative_performance = ad['performance_score'] / average_score
-                
-                # Definir limites para evitar mudanças extremas
-                adjustment_factor = min(max(relative_performance, 0.7), 1.5)
-                
-                # Calcular novo orçamento ideal
-                ideal_budget = (ad['performance_score'] / total_score) * total_budget
-                
-                # Ajustar gradualmente para evitar mudanças bruscas (mescla 70/30)
-                current_budget = ad.get('budget', 0)
-                new_budget = (current_budget * 0.7) + (ideal_budget * 0.3)
-                
-                # Arredondar para 2 casas decimais
-                new_budget = round(new_budget, 2)
-                
-                # Registrar mudança
-                logger.info(f"Anúncio {ad.get('id', 'desconhecido')}: " +
-                           f"Orçamento {current_budget:.2f} -> {new_budget:.2f} " +
-                           f"(Ajuste: {((new_budget/current_budget) - 1) * 100:.1f}%)")
-                
-                # Atualizar orçamento no objeto
-                ad['previous_budget'] = current_budget
-                ad['budget'] = new_budget
-                ad['budget_change_percent'] = ((new_budget/current_budget) - 1) * 100
+                return None
             
-            return ads_performance
+            if total_score == 0:
+                logger.warning("Pontuação total zero, não é possível realocar")
+                return None
+            
+            # Calcular orçamento ideal proporcional à pontuação
+            ideal_budgets = (scores / total_score) * total_budget
+            
+            # Ajustar gradualmente para evitar mudanças bruscas (mescla 70/30)
+            new_budgets = np.round((budgets * 0.7) + (ideal_budgets * 0.3), 2)
+            
+            # Variação percentual (anúncios sem orçamento anterior ficam com 0)
+            safe_budgets = np.where(budgets > 0, budgets, 1.0)
+            change_percents = np.where(budgets > 0, ((new_budgets / safe_budgets) - 1) * 100, 0.0)
+            
+            # Registrar mudanças
+            if logger.isEnabledFor(logging.INFO):
+                for ad_id, current_budget, new_budget, change_percent in zip(
+                    ids, budgets.tolist(), new_budgets.tolist(), change_percents.tolist()
+                ):
+                    logger.info("Anúncio %s: Orçamento %.2f -> %.2f (Ajuste: %.1f%%)",
+                                ad_id if ad_id is not None else 'desconhecido',
+                                current_budget, new_budget, change_percent)
+            
+            return ids, budgets, new_budgets, scores, change_percents
             
         except Exception as e:
             logger.error(f"Erro ao realocar orçamento: {str(e)}")
-            return ads_performance
+            return None
     
     def optimize_bids(self, campaign_data, target_cpa=None):
         """
@@ -230,20 +680,8 @@ class CampaignOptimizer:
                     calculated_cpa = cpc / conversion_rate
                     target_cpa = calculated_cpa * 0.9  # Tentar reduzir o CPA calculado em 10%
             
-            # Calcular lance ideal baseado no CPA alvo e taxa de conversão
-            ideal_bid = target_cpa * conversion_rate
-            
-            # Ajustar gradualmente para evitar mudanças bruscas
-            bid_adjustment = (ideal_bid / cpc) if cpc > 0 else 1.0
-            
-            # Limitar ajustes para evitar mudanças extremas
-            bid_adjustment = min(max(bid_adjustment, 0.7), 1.3)
-            
             # Calcular novo lance
-            new_bid = cpc * bid_adjustment
-            
-            # Arredondar para 2 casas decimais
-            new_bid = round(new_bid, 2)
+            new_bid, bid_adjustment = _compute_bid(cpc, conversion_rate, target_cpa)
             
             # Registrar recomendação
             logger.info(f"Otimização de lances para campanha {campaign_data.get('id', 'desconhecida')}:")
@@ -279,7 +717,91 @@ class CampaignOptimizer:
     
     def save_recommendations(self, recommendations, campaign_id=None):
         """
-        Salva as recomendações de otimização em um arquivo
+        Salva as recomendações de otimização
+        As recomendações são serializadas na chamada, enfileiradas e gravadas em lote
+        no banco SQLite de recomendações
+        
+        Args:
+            recommendations (Recommendation ou dict): Recomendações geradas
+            campaign_id (str): Identificador da campanha
+            
+        Returns:
+            str: Caminho do banco SQLite onde as recomendações serão salvas (no modo eager,
+                 o caminho do arquivo texto, como nas versões anteriores); None em caso de erro
+        """
+        if isinstance(recommendations, Recommendation) and (self.eager or self.verbose):
+            recommendations = recommendations.to_dict()
+        
+        if self.eager:
+            return self._write_recommendation_file(recommendations, campaign_id)
+        
+        if self.verbose:
+            self._write_recommendation_file(recommendations, campaign_id)
+        
+        # Registro a ser gravado, sem alterar o dicionário do chamador
+        if isinstance(recommendations, Recommendation):
+            record = recommendations.to_dict()
+        elif isinstance(recommendations, dict):
+            record = dict(recommendations)
+            record.setdefault('campaign_id', campaign_id)
+        else:
+            record = {'campaign_id': campaign_id, 'recommendations': str(recommendations)}
+        
+        error_path = self._cwd / "error_log.txt"
+        
+        # Serializar agora: alterações posteriores do chamador não afetam o que é gravado
+        try:
+            record_id = record.get('campaign_id')
+            row = (
+                datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                None if record_id is None else str(record_id),
+                _dump_json(record)
+            )
+        except Exception as e:
+            _log_save_error(error_path, e)
+            return None
+        
+        _WRITER.put(self._db_path, error_path, row)
+        return str(self._db_path)
+    
+    def flush(self):
+        """
+        Aguarda a gravação de todas as recomendações enfileiradas
+        """
+        if not self.eager:
+            _WRITER.flush()
+    
+    def query(self, campaign_id=None, limit=100):
+        """
+        Consulta as recomendações salvas, das mais recentes para as mais antigas
+        
+        Args:
+            campaign_id (str): Filtrar por campanha
+            limit (int): Número máximo de recomendações
+            
+        Returns:
+            list: Recomendações (dicionários)
+        """
+        # Incluir as recomendações ainda na fila
+        self.flush()
+        
+        if not self._db_path.exists():
+            return []
+        
+        sql = "SELECT payload FROM recs"
+        params = []
+        if campaign_id is not None:
+            sql += " WHERE campaign_id = ?"
+            params.append(str(campaign_id))
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        
+        with closing(sqlite3.connect(self._db_path)) as conn:
+            return [json.loads(payload) for (payload,) in conn.execute(sql, params)]
+    
+    def _write_recommendation_file(self, recommendations, campaign_id=None):
+        """
+        Salva as recomendações de otimização em um arquivo texto próprio
         
         Args:
             recommendations (dict): Recomendações geradas
@@ -288,9 +810,11 @@ class CampaignOptimizer:
         Returns:
             str: Caminho do arquivo salvo
         """
+        now = datetime.datetime.now()
+        
         try:
             # Gerar nome de arquivo baseado na data atual
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            timestamp = now.strftime("%Y%m%d_%H%M%S")
             filename = f"budget_recommendations_{timestamp}.txt"
             
             if campaign_id:
@@ -298,35 +822,38 @@ class CampaignOptimizer:
                 filename = f"budget_recommendations_{campaign_id}_{timestamp}.txt"
             
             # Caminho completo
-            file_path = os.path.join(os.getcwd(), filename)
-            
-            # Salvar recomendações
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(f"=== RECOMENDAÇÕES DE OTIMIZAÇÃO ===\n")
-                f.write(f"Data: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
-                f.write(f"Campanha: {campaign_id or 'Não especificada'}\n\n")
-                
-                # Converter recomendações para formato texto
-                if isinstance(recommendations, dict):
-                    # Se for um dicionário, formatar detalhadamente
-                    for key, value in recommendations.items():
-                        if isinstance(value, dict):
-                            f.write(f"=== {key.upper()} ===\n")
-                            for sub_key, sub_value in value.items():
-                                f.write(f"{sub_key}: {sub_value}\n")
-                            f.write("\n")
-                        else:
-                            f.write(f"{key}: {value}\n")
-                else:
-                    # Caso contrário, converter para string
-                    f.write(str(recommendations))
+            file_path = self._rec_path / filename
+            
+            # Montar o conteúdo em memória
+            lines = [
+                "=== RECOMENDAÇÕES DE OTIMIZAÇÃO ===\n",
+                f"Data: {now.strftime('%d/%m/%Y %H:%M:%S')}\n",
+                f"Campanha: {campaign_id or 'Não especificada'}\n\n"
+            ]
+            
+            # Converter recomendações para formato texto
+            if isinstance(recommendations, dict):
+                # Se for um dicionário, formatar detalhadamente
+                for key, value in recommendations.items():
+                    if isinstance(value, dict):
+                        lines.append(f"=== {key.upper()} ===\n")
+                        lines.extend(f"{sub_key}: {sub_value}\n" for sub_key, sub_value in value.items())
+                        lines.append("\n")
+                    else:
+                        lines.append(f"{key}: {value}\n")
+            else:
+                # Caso contrário, converter para string
+                lines.append(str(recommendations))
+            
+            # Salvar recomendações com uma única escrita
+            file_path.write_text(''.join(lines), encoding='utf-8')
             
             logger.info(f"Recomendações salvas em: {file_path}")
-            return file_path
+            return str(file_path)
             
         except Exception as e:
             logger.error(f"Erro ao salvar recomendações: {str(e)}")
-            error_path = os.path.join(os.getcwd(), "error_log.txt")
+            error_path = self._cwd / "error_log.txt"
             with open(error_path, 'a', encoding='utf-8') as f:
-                f.write(f"{datetime.datetime.now()}: Erro ao salvar recomendações: {str(e)}\n")
+                f.write(f"{now}: Erro ao salvar recomendações: {str(e)}\n")
             return None